@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Async Report Generator - Reporting System
+Awaitable load/render API for embedding report generation in an asyncio event loop
+"""
+
+import asyncio
+import contextlib
+import functools
+from datetime import datetime
+from pathlib import Path
+
+from file_lock import folder_lock, output_lock
+from report_generator import DEFAULT_REPORT_FOLDER, ReportGenerator
+from template_engine import load_template
+
+DEFAULT_CONCURRENCY = 8
+
+# Generators used by _render_file, one per folder/backend in each process
+_file_renderers = {}
+
+
+def _render_file(report_folder, output_folder, backend, html_content, output_path):
+    """Render PDF file with a ReportGenerator (works in thread and process executors)"""
+    key = (report_folder, output_folder, backend)
+    generator = _file_renderers.get(key)
+    if generator is None:
+        generator = _file_renderers[key] = ReportGenerator(
+            report_folder, output_folder=output_folder, backend=backend
+        )
+    generator.render_pdf(html_content, output_path)
+    return output_path
+
+
+class AsyncReportGenerator:
+    """ReportGenerator with awaitable load_sections, render_html and render_pdf
+
+    File I/O, JSON parsing and template injection run in an executor (the
+    loop's default thread pool unless one is given), using the same code as
+    the sync path so output is byte-identical. Playwright renders go through
+    its async API on a shared AsyncBrowserPool; other backends run in
+    pdf_executor, which may be a ProcessPoolExecutor for CPU-bound backends.
+    At most `concurrency` PDF renders run at once.
+    """
+
+    def __init__(self, report_folder=DEFAULT_REPORT_FOLDER, data_folder=None, output_folder=None,
+                 backend=None, concurrency=DEFAULT_CONCURRENCY, executor=None, pdf_executor=None,
+                 browser_pool=None):
+        self.generator = ReportGenerator(report_folder, data_folder, output_folder, backend)
+        self.pdf_method = self.generator.pdf_method
+        self.concurrency = concurrency
+        self.executor = executor
+        self.pdf_executor = pdf_executor or executor
+        self._semaphore = None
+        self._output_locks = {}  # output path -> [asyncio.Lock, number of users]
+        self._browser_pool = browser_pool
+        self._owns_browser_pool = browser_pool is None
+
+    async def _run(self, func, *args, executor=None, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor or self.executor, functools.partial(func, *args, **kwargs))
+
+    @property
+    def semaphore(self):
+        # Created on first use so it belongs to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    @contextlib.asynccontextmanager
+    async def _output_guard(self, output_path):
+        """Serialize calls writing the same output in this process
+
+        Only one of them then waits for the output's file lock, so calls for
+        one path can never take up every executor thread.
+        """
+        key = str(output_path)
+        entry = self._output_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._output_locks[key]
+
+    def _template_path(self, html_path):
+        return Path(html_path) if html_path else self.generator.template_path
+
+    async def load_sections(self, html_path=None, section_files=None):
+        """Load section data ({section_id: data}) from explicit files or saved_sections"""
+        if section_files:
+            return await self._run(self.generator.load_section_files, section_files)
+        template = await self._run(load_template, self._template_path(html_path))
+        return await self._run(self.generator.load_sections, template.registry.section_ids)
+
+    async def render_html(self, html_path=None, all_data=None):
+        """Filled report HTML; sections are loaded when all_data is not given"""
+        html_path = self._template_path(html_path)
+        if all_data is None:
+            all_data = await self.load_sections(html_path)
+        return await self._run(self.generator.inject_data_into_html, html_path, all_data)
+
+    async def browser_pool(self):
+        if self._browser_pool is None:
+            from browser_pool import AsyncBrowserPool
+            self._browser_pool = AsyncBrowserPool(size=min(self.concurrency, 4))
+        return await self._browser_pool.start()
+
+    async def render_pdf(self, html_content, output_path):
+        """Render filled HTML to output_path with the configured backend"""
+        async with self.semaphore:
+            if self.pdf_method == 'playwright':
+                pool = await self.browser_pool()
+                await pool.render(html_content, output_path, base_folder=self.generator.report_folder)
+            elif self.pdf_method == 'browser':
+                raise RuntimeError("No PDF library available")
+            else:
+                await self._run(
+                    _render_file, str(self.generator.report_folder), str(self.generator.output_folder),
+                    self.pdf_method, html_content, str(output_path), executor=self.pdf_executor
+                )
+        return Path(output_path)
+
+    async def generate_pdf(self, html_path=None, output_name=None, section_files=None, force=False):
+        """Render report to output_folder, reusing the render cache like the sync path
+
+        Without a PDF library the filled HTML is written next to the PDF
+        name instead (no browser is opened). Returns the written path.
+        """
+        generator = self.generator
+        html_path = self._template_path(html_path)
+        if output_name is None:
+            output_name = f"data_quality_report_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.pdf"
+        output_path = generator.output_folder / output_name
+
+        all_data = await self.load_sections(html_path, section_files) if section_files else None
+
+        if self.pdf_method == 'browser':
+            html_content = await self.render_html(html_path, all_data)
+            filled_html = output_path.with_suffix('.html')
+            await self._run(filled_html.write_text, html_content, encoding='utf-8')
+            return filled_html
+
+        cache_key = await self._run(generator.render_cache_key, html_path, section_files)
+        if not force and await self._run(generator.cache.fetch, cache_key, output_path):
+            return output_path
+
+        async with self._output_guard(output_path):
+            lock = await self._run(output_lock(output_path).acquire)
+            try:
+                data_lock = await self._run(folder_lock(generator.data_folder, shared=True).acquire)
+                try:
+                    html_content = await self.render_html(html_path, all_data)
+                finally:
+                    data_lock.release()
+                await self._run(generator.cache.release, output_path)
+                await self.render_pdf(html_content, output_path)
+                await self._run(generator.cache.store, cache_key, output_path)
+            finally:
+                lock.release()
+        return output_path
+
+    async def close(self):
+        """Close the browser pool if this generator created it"""
+        if self._browser_pool is not None and self._owns_browser_pool:
+            await self._browser_pool.close()
+            self._browser_pool = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
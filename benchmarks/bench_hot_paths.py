@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Hot Path Benchmarks - Reporting System
+Times section loading, HTML injection, listings, moving files and PDF backends
+on synthetic data and writes the results as JSON.
+
+Usage:
+    python benchmarks/bench_hot_paths.py [--revisions N] [--field-size BYTES]
+        [--full-ratio R] [--iterations N] [--downloads N] [--output FILE]
+        [--only name,name] [--compare BASELINE.json] [--threshold PCT]
+"""
+
+import builtins
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_FOLDER = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_FOLDER.parent))
+sys.path.insert(0, str(BENCH_FOLDER))
+
+from cli_args import parse_args  # noqa: E402
+from synthetic import SECTION_FIELDS, make_downloads, make_report_folder  # noqa: E402
+
+VALUE_OPTIONS = {'revisions', 'field-size', 'full-ratio', 'iterations', 'downloads',
+                 'output', 'only', 'compare', 'threshold'}
+
+DEFAULT_CONFIG = {
+    'revisions': 2000,
+    'field_size': 500,
+    'full_ratio': 0.1,
+    'iterations': 20,
+    'downloads': 200,
+}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the emoji status output of the code under test"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def timed(func, iterations, setup=None):
+    """Call func iterations times and return latencies in seconds"""
+    latencies = []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+# Benchmarks: each takes (report_folder, config) and returns a list of latencies
+
+def bench_index_refresh_cold(folder, config):
+    from section_index import INDEX_FILENAME, SectionIndex
+
+    def reset():
+        for suffix in ('', '-wal', '-shm'):
+            path = folder / "saved_sections" / (INDEX_FILENAME + suffix)
+            if path.exists():
+                path.unlink()
+
+    def refresh():
+        index = SectionIndex(folder / "saved_sections")
+        index.refresh()
+        index.close()
+
+    return timed(refresh, max(3, config['iterations'] // 10), setup=reset)
+
+
+def bench_load_section_data(folder, config):
+    from report_generator import ReportGenerator
+    generator = ReportGenerator(folder)
+    generator.index.refresh()
+
+    def load():
+        for section_id in SECTION_FIELDS:
+            generator.load_section_data(section_id)
+
+    return timed(load, config['iterations'])
+
+
+def bench_inject_data_into_html(folder, config):
+    from report_generator import ReportGenerator
+    generator = ReportGenerator(folder)
+    template = folder / "report_template.html"
+    generator.inject_data_into_html(template)
+    return timed(lambda: generator.inject_data_into_html(template), config['iterations'])
+
+
+def bench_render_template_only(folder, config):
+    from report_generator import ReportGenerator
+    from template_engine import load_template
+    generator = ReportGenerator(folder)
+    template_path = folder / "report_template.html"
+    all_data = {section_id: generator.load_section_data(section_id) for section_id in SECTION_FIELDS}
+    template = load_template(template_path)
+    values = generator.build_slot_values({k: v for k, v in all_data.items() if v}, template.registry)
+    return timed(lambda: load_template(template_path).render(values), config['iterations'] * 50)
+
+
+def bench_report_generator_list(folder, config):
+    from report_generator import ReportGenerator
+    generator = ReportGenerator(folder)
+    return timed(generator.list_saved_sections, config['iterations'])
+
+
+def bench_file_manager_list(folder, config):
+    from file_manager import FileManager
+    manager = FileManager(folder)
+    return timed(manager.list_saved_sections, config['iterations'])
+
+
+def bench_move_files_from_downloads(folder, config):
+    from file_manager import FileManager
+    manager = FileManager(folder)
+    downloads = folder / "Downloads"
+    manager.downloads_folder = downloads
+    builtins.input = lambda prompt='': 'y'
+
+    # Start every iteration from the same saved_sections (and index), so
+    # each one moves the downloads instead of skipping them as duplicates
+    saved_sections = folder / "saved_sections"
+    pristine = folder / "saved_sections.pristine"
+    manager.index.close()
+    shutil.copytree(saved_sections, pristine)
+
+    def setup():
+        manager.index.close()
+        shutil.rmtree(saved_sections)
+        shutil.copytree(pristine, saved_sections)
+        shutil.rmtree(downloads, ignore_errors=True)
+        make_downloads(downloads, config['downloads'], config['field_size'], config['full_ratio'])
+
+    return timed(manager.move_files_from_downloads, max(3, config['iterations'] // 4), setup=setup)
+
+
+def make_backend_bench(backend):
+    def bench(folder, config):
+        from report_generator import ReportGenerator
+        generator = ReportGenerator(folder, backend=backend)
+        html_content = generator.inject_data_into_html(folder / "report_template.html")
+        output = folder / "generated_pdfs" / f"bench_{backend}.pdf"
+        return timed(lambda: generator.render_pdf(html_content, output), max(3, config['iterations'] // 4))
+    return bench
+
+
+def benchmark_names():
+    from report_generator import available_backends
+    names = [name[len('bench_'):] for name in globals() if name.startswith('bench_')]
+    names += [f"pdf_{backend}" for backend in available_backends()]
+    return names
+
+
+def run_benchmark(name, folder, config):
+    """Run one benchmark (inside a fresh process) and summarize it"""
+    if name.startswith('pdf_'):
+        func = make_backend_bench(name[len('pdf_'):])
+    else:
+        func = globals()[f"bench_{name}"]
+
+    with quiet():
+        latencies = func(Path(folder), config)
+
+    ordered = sorted(latencies)
+    total = sum(latencies)
+    return {
+        'iterations': len(latencies),
+        'total_s': total,
+        'throughput_per_s': len(latencies) / total if total else None,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p50_ms': percentile(ordered, 0.50) * 1000,
+        'p99_ms': percentile(ordered, 0.99) * 1000,
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of sorted samples (p99 of few samples is the slowest one)"""
+    return ordered[math.ceil(p * len(ordered)) - 1]
+
+
+def peak_rss_kb():
+    """Peak resident memory of this process in KiB (None where unavailable)"""
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == 'darwin' else 1)
+
+
+def compare(results, baseline_path, threshold):
+    """Print change vs baseline; returns names that regressed by more than threshold %"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    print(f"\n📊 Compared with {baseline_path}:")
+    for name, result in results.items():
+        if name not in baseline or 'error' in result or 'error' in baseline[name]:
+            continue
+        before = baseline[name]['p50_ms']
+        change = (result['p50_ms'] - before) / before * 100 if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = " ❌ REGRESSION"
+        print(f"  {name:32s} p50 {before:9.3f} → {result['p50_ms']:9.3f} ms ({change:+.1f}%){flag}")
+    return regressions
+
+
+def main():
+    args, options = parse_args(sys.argv[1:], VALUE_OPTIONS)
+    config = dict(DEFAULT_CONFIG)
+    for key, default in DEFAULT_CONFIG.items():
+        option = key.replace('_', '-')
+        if option in options:
+            config[key] = type(default)(options[option])
+
+    names = benchmark_names()
+    if 'only' in options:
+        names = [name for name in names if name in options['only'].split(',')]
+
+    output = Path(options.get('output', BENCH_FOLDER / "results" /
+                              f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🔧 Generating {config['revisions']} revisions ({config['field_size']} B fields)...")
+        template_folder = make_report_folder(Path(tmp) / "template", config['revisions'],
+                                             config['field_size'], config['full_ratio'])
+
+        # Each benchmark runs in a fresh process on its own copy of the tree,
+        # so peak RSS and on-disk state are not shared between benchmarks
+        context = multiprocessing.get_context('spawn')
+        for name in names:
+            folder = Path(tmp) / name
+            shutil.copytree(template_folder, folder)
+            with context.Pool(1) as pool:
+                try:
+                    results[name] = pool.apply(run_benchmark, (name, str(folder), config))
+                except Exception as e:
+                    results[name] = {'error': f"{type(e).__name__}: {e}"}
+            shutil.rmtree(folder)
+
+            result = results[name]
+            if 'error' in result:
+                print(f"  ❌ {name:32s} {result['error']}")
+            else:
+                rss = f"{result['peak_rss_kb'] / 1024:.1f} MB" if result['peak_rss_kb'] is not None else "n/a"
+                print(f"  ✅ {name:32s} p50 {result['p50_ms']:9.3f} ms  p99 {result['p99_ms']:9.3f} ms  "
+                      f"{result['throughput_per_s']:9.1f}/s  RSS {rss}")
+
+    report = {
+        'created': datetime.now().isoformat(),
+        'config': config,
+        'environment': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📁 Results: {output}")
+
+    if 'compare' in options:
+        threshold = float(options.get('threshold', 20))
+        if compare(results, options['compare'], threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - Reporting System
+Measures CLI startup time and checks that `list` does not import PDF libraries
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_FOLDER = Path(__file__).resolve().parent.parent
+PDF_MODULES = ['weasyprint', 'pdfkit', 'playwright']
+
+
+def time_command(command, runs):
+    """Run command several times and return wall times in seconds"""
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_FOLDER))
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=PROJECT_FOLDER, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def imported_pdf_modules():
+    """PDF modules present in sys.modules after importing report_generator"""
+    code = (
+        "import json, sys, report_generator; "
+        f"print(json.dumps([m for m in {PDF_MODULES!r} if m in sys.modules]))"
+    )
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_FOLDER))
+    output = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_FOLDER, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(times):
+    return {
+        'runs': len(times),
+        'mean_ms': statistics.mean(times) * 1000,
+        'min_ms': min(times) * 1000,
+        'max_ms': max(times) * 1000,
+    }
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    with tempfile.TemporaryDirectory() as folder:
+        results = {
+            'python': summarize(time_command([sys.executable, '-c', 'pass'], runs)),
+            'list': summarize(time_command(
+                [sys.executable, 'report_generator.py', 'list', '--folder', folder], runs
+            )),
+            'imported_pdf_modules': imported_pdf_modules(),
+        }
+
+    # Cost that eager backend imports used to add to every command
+    for module in PDF_MODULES:
+        try:
+            results[f'import_{module}'] = summarize(
+                time_command([sys.executable, '-c', f'import {module}'], runs)
+            )
+        except subprocess.CalledProcessError:
+            results[f'import_{module}'] = None
+
+    print(json.dumps(results, indent=2))
+    if results['imported_pdf_modules']:
+        print(f"❌ PDF libraries imported at startup: {results['imported_pdf_modules']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data - Reporting System benchmarks
+Generates saved_sections/ trees and Downloads folders of configurable size
+"""
+
+import json
+import os
+import random
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from template_engine import load_template
+
+PROJECT_FOLDER = Path(__file__).resolve().parent.parent
+
+# Section id -> field ids, from the registry of the project template
+SECTION_FIELDS = load_template(PROJECT_FOLDER / "report_template.html").registry.fields
+
+AUTHORS = ['Jane Smith', 'John Doe', 'Anna Nowak', 'Piotr Kowalski']
+
+
+def field_text(rng, size):
+    """Pseudo-random text of roughly size characters"""
+    words = ['data', 'quality', 'record', 'missing', 'value', 'customer', 'system',
+             'check', 'rule', 'table', 'duplicate', 'format']
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(words)
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts)[:size]
+
+
+def section_data(rng, section_id, timestamp, field_size):
+    return {
+        'sectionId': section_id,
+        'timestamp': timestamp.isoformat() + 'Z',
+        'author': rng.choice(AUTHORS),
+        'fields': {field_id: field_text(rng, field_size) for field_id in SECTION_FIELDS[section_id]},
+    }
+
+
+def make_saved_sections(folder, revisions=1000, field_size=500, full_ratio=0.1, seed=1):
+    """Write revisions JSON files into folder; full_ratio of them are full reports
+
+    Files get increasing mtimes so "newest" is well defined.
+    """
+    rng = random.Random(seed)
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    start = datetime(2024, 1, 1)
+    base_mtime = 1_700_000_000
+
+    for i in range(revisions):
+        timestamp = start + timedelta(minutes=i)
+        millis = int(timestamp.timestamp() * 1000)
+        if rng.random() < full_ratio:
+            author = rng.choice(AUTHORS)
+            data = {
+                'reportType': 'Data Quality Report',
+                'savedAt': timestamp.isoformat() + 'Z',
+                'author': author,
+                'sections': {
+                    section_id: dict(section_data(rng, section_id, timestamp, field_size), author=author)
+                    for section_id in SECTION_FIELDS
+                },
+            }
+            name = f"data_quality_report_full_{millis}.json"
+        else:
+            section_id = rng.choice(list(SECTION_FIELDS))
+            data = section_data(rng, section_id, timestamp, field_size)
+            name = f"{section_id}_{millis}.json"
+
+        path = folder / name
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.utime(path, (base_mtime + i, base_mtime + i))
+
+    return folder
+
+
+def make_report_folder(folder, revisions=1000, field_size=500, full_ratio=0.1, seed=1):
+    """Create report folder with template, saved_sections and generated_pdfs"""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    shutil.copy(PROJECT_FOLDER / "report_template.html", folder / "report_template.html")
+    make_saved_sections(folder / "saved_sections", revisions, field_size, full_ratio, seed)
+    (folder / "generated_pdfs").mkdir(exist_ok=True)
+    return folder
+
+
+def make_downloads(folder, count=100, field_size=500, full_ratio=0.1, seed=2):
+    """Fill a fake Downloads folder with report files plus unrelated files"""
+    make_saved_sections(folder, count, field_size, full_ratio, seed)
+    for i in range(count // 10):
+        (Path(folder) / f"unrelated_{i}.txt").write_text("not a report")
+    return folder
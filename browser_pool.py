@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Browser Pool - Reporting System
+Long-lived headless Chromium pool for the Playwright PDF backend
+"""
+
+import asyncio
+import atexit
+import re
+from pathlib import Path
+
+HEAD_PATTERN = re.compile(r'<head[^>]*>', re.IGNORECASE)
+
+
+def with_base_url(html_content, base_folder):
+    """Add <base href> so relative assets resolve like a file:/// page"""
+    if base_folder is None or '<base ' in html_content:
+        return html_content
+    base_url = Path(base_folder).resolve().as_uri() + '/'
+    match = HEAD_PATTERN.search(html_content)
+    if match is None:
+        return html_content
+    tag = f'<base href="{base_url}">'
+    return html_content[:match.end()] + tag + html_content[match.end():]
+
+
+class BrowserPool:
+    """One Chromium instance with one reusable page (sync API, single thread)
+
+    The sync API renders one document at a time, so a single page is kept
+    and recycled after max_uses renders. Use AsyncBrowserPool to print on
+    several pages concurrently.
+    """
+
+    def __init__(self, max_uses=50, pdf_options=None):
+        self.max_uses = max_uses
+        self.pdf_options = pdf_options or {'format': 'A4'}
+        self._playwright = None
+        self._browser = None
+        self._page = None
+        self._uses = 0
+
+    def start(self):
+        """Launch browser (done automatically on first render)"""
+        if self._browser is None:
+            from playwright.sync_api import sync_playwright
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch()
+        return self
+
+    def _take_page(self):
+        if self._page is not None and self._uses >= self.max_uses:
+            # Recycle page to release memory held by previous documents
+            self._page.close()
+            self._page = None
+        if self._page is None:
+            self._page = self._browser.new_page()
+            self._uses = 0
+        self._uses += 1
+        return self._page
+
+    def render(self, html_content, output_path=None, base_folder=None):
+        """Print HTML to PDF; writes output_path if given, returns PDF bytes"""
+        self.start()
+        page = self._take_page()
+        page.set_content(with_base_url(html_content, base_folder), wait_until='load')
+        options = dict(self.pdf_options)
+        if output_path is not None:
+            options['path'] = str(output_path)
+        return page.pdf(**options)
+
+    def close(self):
+        """Close page, browser and Playwright driver"""
+        if self._page is not None:
+            self._page.close()
+            self._page = None
+        if self._browser is not None:
+            self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncBrowserPool:
+    """One Chromium instance with N pages printing concurrently (async API)"""
+
+    def __init__(self, size=4, max_uses=50, pdf_options=None):
+        self.size = size
+        self.max_uses = max_uses
+        self.pdf_options = pdf_options or {'format': 'A4'}
+        self._playwright = None
+        self._browser = None
+        self._idle = None
+        self._pages = []
+        self._start_lock = None
+
+    async def start(self):
+        """Launch browser and open pages (done automatically on first render)"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._browser is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch()
+                self._idle = asyncio.Queue()
+                for _ in range(self.size):
+                    page = await self._browser.new_page()
+                    self._pages.append(page)
+                    self._idle.put_nowait([page, 0])
+        return self
+
+    async def render(self, html_content, output_path=None, base_folder=None):
+        """Print HTML to PDF on the next free page; returns PDF bytes"""
+        await self.start()
+        slot = await self._idle.get()
+        try:
+            if slot[1] >= self.max_uses:
+                await slot[0].close()
+                self._pages.remove(slot[0])
+                slot[0] = await self._browser.new_page()
+                self._pages.append(slot[0])
+                slot[1] = 0
+            slot[1] += 1
+            page = slot[0]
+            await page.set_content(with_base_url(html_content, base_folder), wait_until='load')
+            options = dict(self.pdf_options)
+            if output_path is not None:
+                options['path'] = str(output_path)
+            return await page.pdf(**options)
+        finally:
+            self._idle.put_nowait(slot)
+
+    async def close(self):
+        """Close pages, browser and Playwright driver"""
+        for page in self._pages:
+            await page.close()
+        self._pages = []
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+# Shared pool used by ReportGenerator.generate_pdf_playwright
+_shared_pool = None
+
+
+def get_browser_pool(max_uses=50):
+    """Return process-wide sync browser pool, created on first use"""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = BrowserPool(max_uses=max_uses)
+        atexit.register(_shared_pool.close)
+    return _shared_pool
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Command Line Arguments - Reporting System
+Shared option parsing for report_generator.py and file_manager.py
+"""
+
+
+def parse_args(argv, value_options=()):
+    """Split command line into positional arguments and --options
+
+    Options listed in value_options take a value (--name value or
+    --name=value); all others are flags set to True.
+    """
+    args = []
+    options = {}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith('--'):
+            name, has_value, value = arg[2:].partition('=')
+            if name in value_options and not has_value and i + 1 < len(argv):
+                i += 1
+                value = argv[i]
+                has_value = True
+            options[name] = value if has_value else True
+        else:
+            args.append(arg)
+        i += 1
+    return args, options
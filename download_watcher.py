@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Download Watcher - Reporting System
+Event-driven folder watcher using Linux inotify (through ctypes)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+
+# inotify constants (see <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyUnavailable(Exception):
+    """Raised when inotify cannot be used on this system"""
+
+
+class InotifyWatcher:
+    """Report files that finished writing or were moved into watched folders"""
+
+    def __init__(self, folder, mask=IN_CLOSE_WRITE | IN_MOVED_TO):
+        if not sys.platform.startswith('linux'):
+            raise InotifyUnavailable("inotify is only available on Linux")
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            inotify_init1 = libc.inotify_init1
+            inotify_add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError) as e:
+            raise InotifyUnavailable(str(e))
+
+        inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch = inotify_add_watch
+        self.mask = mask
+
+        self.fd = inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise InotifyUnavailable(os.strerror(ctypes.get_errno()))
+
+        self.folders = {}  # watch descriptor -> folder
+        try:
+            self.add_folder(folder)
+        except InotifyUnavailable:
+            os.close(self.fd)
+            raise
+
+        self.overflowed = False
+
+    def add_folder(self, folder, mask=None):
+        """Watch another folder (with the watcher's event mask unless mask is given)"""
+        wd = self._add_watch(self.fd, os.fsencode(folder), self.mask if mask is None else mask)
+        if wd < 0:
+            raise InotifyUnavailable(os.strerror(ctypes.get_errno()))
+        self.folders[wd] = folder
+
+    def read_events(self, timeout=None):
+        """Wait up to timeout seconds and return (folder, file name) of pending events"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Kernel queue overflowed, caller should rescan the folder
+                self.overflowed = True
+            elif not mask & IN_IGNORED and name:
+                events.append((self.folders.get(wd), os.fsdecode(name)))
+        return events
+
+    def wait_for_batch(self, debounce=0.2):
+        """Block until events arrive, then collect until quiet for debounce seconds"""
+        return {name for _, name in self.wait_for_events(debounce)}
+
+    def wait_for_events(self, debounce=0.2):
+        """Like wait_for_batch, but returns (folder, file name) pairs"""
+        events = set(self.read_events())
+        while True:
+            more = self.read_events(debounce)
+            if not more and not self.overflowed:
+                return events
+            events.update(more)
+            if self.overflowed:
+                return events
+
+    def close(self):
+        """Stop watching"""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+File Lock - Reporting System
+Advisory locks shared between processes (fcntl on POSIX, msvcrt on Windows)
+"""
+
+import os
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_FILENAME = ".lock"
+
+
+class FileLock:
+    """Context manager holding a lock on a lock file
+
+    Shared locks let readers (renders) run together while excluding writers
+    (ingest, compaction). Windows has no shared locks, so there every lock
+    is exclusive. Locks are not reentrant: do not nest two locks on the
+    same file in one thread.
+    """
+
+    def __init__(self, path, shared=False):
+        self.path = Path(path)
+        self.shared = shared
+        self._fd = None
+
+    def acquire(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        # Blocks for up to 10 seconds before raising
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return self
+
+    def release(self):
+        if self._fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def folder_lock(folder, shared=False):
+    """Lock guarding the contents of a folder (e.g. saved_sections)"""
+    return FileLock(Path(folder) / LOCK_FILENAME, shared)
+
+
+def output_lock(output_path):
+    """Lock guarding one output file while it is rendered"""
+    output_path = Path(output_path)
+    return FileLock(output_path.with_name(f".{output_path.name}.lock"))
@@ -4,13 +4,25 @@ File Manager - Reporting System
 Helper script for managing JSON files (auto-move from Downloads, list sections, etc.)
 """
 
+import json
 import os
+import re
 import sys
 import time
-import shutil
 from pathlib import Path
 from datetime import datetime
 
+from cli_args import parse_args
+from download_watcher import (IN_CLOSE_WRITE, IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO,
+                              InotifyWatcher, InotifyUnavailable)
+from file_lock import folder_lock
+from ingest import BulkIngest, DEFAULT_WORKERS, QUARANTINE_FOLDER, quarantine
+from revision_store import RevisionStore
+from section_index import KIND_INVALID, SectionIndex, record_summary
+from section_schema import SchemaError, normalize_file
+from template_engine import FULL_REPORT_PREFIXES, load_registry
+from workspace import Workspace
+
 # Colors for terminal output (ANSI)
 class Colors:
     HEADER = '\033[95m'
@@ -22,33 +34,41 @@ class Colors:
     BOLD = '\033[1m'
 
 
+DEFAULT_PROJECT_FOLDER = "c:/repos/report"
+
+# Full reports only, used when the project has no template to take section ids from
+FULL_REPORT_PATTERN = re.compile(
+    '(?:' + '|'.join(FULL_REPORT_PREFIXES) + r')_.*\.json'
+)
+
+
 class FileManager:
-    def __init__(self, project_folder="c:/repos/report"):
+    def __init__(self, project_folder=DEFAULT_PROJECT_FOLDER, template_path=None):
         self.project_folder = Path(project_folder)
         self.saved_sections = self.project_folder / "saved_sections"
+        self.template_path = Path(template_path) if template_path else self.project_folder / "report_template.html"
         self.downloads_folder = Path.home() / "Downloads"
         
         # Create folders if they don't exist
         self.saved_sections.mkdir(exist_ok=True)
+        
+        self.index = SectionIndex(self.saved_sections)
+        self.revisions = RevisionStore(self.index)
+    
+    def download_pattern(self):
+        """Regex matching report file names for the sections of the project template"""
+        registry = load_registry(self.template_path)
+        return registry.download_pattern if registry else FULL_REPORT_PATTERN
     
     def find_json_files_in_downloads(self):
         """Find report JSON files in Downloads folder"""
-        # Section patterns (individual sections)
-        patterns = [
-            'overall-assessment_*.json',
-            'completeness-analysis_*.json',
-            'accuracy-consistency_*.json',
-            'action-plan_*.json',
-            'report_complete_*.json',
-            'data_quality_report_full_*.json'  # Full reports
-        ]
-        
-        found_files = []
-        for pattern in patterns:
-            files = list(self.downloads_folder.glob(pattern))
-            found_files.extend(files)
-        
-        return found_files
+        pattern = self.download_pattern()
+        try:
+            with os.scandir(self.downloads_folder) as entries:
+                return [Path(entry.path) for entry in entries
+                        if pattern.fullmatch(entry.name) and entry.is_file()]
+        except FileNotFoundError:
+            return []
     
     def move_files_from_downloads(self):
         """Move JSON files from Downloads to saved_sections"""
@@ -73,111 +93,333 @@ class FileManager:
         
         # Move files
         moved_count = 0
-        for file in files:
-            try:
-                dest = self.saved_sections / file.name
-                
-                # If file exists, add timestamp
-                if dest.exists():
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    base_name = dest.stem
-                    dest = self.saved_sections / f"{base_name}_{timestamp}.json"
-                
-                shutil.move(str(file), str(dest))
-                print(f"  {Colors.GREEN}✅ Moved:{Colors.END} {file.name} → {dest.name}")
+        for result in self.ingest(files):
+            self.print_ingest_result(result, "Moved")
+            if result.status == 'moved':
                 moved_count += 1
-            except Exception as e:
-                print(f"  {Colors.RED}❌ Error:{Colors.END} {file.name} - {e}")
         
         print(f"\n{Colors.GREEN}✅ Successfully moved {moved_count} files!{Colors.END}")
         return moved_count
     
-    def list_saved_sections(self):
+    def ingest(self, files, workers=DEFAULT_WORKERS):
+        """Move files into saved_sections (parallel, atomic, skipping exact duplicates)
+        
+        Files are validated and stored with render-ready values; invalid
+        ones go to saved_sections/.quarantine instead. Copies of archived
+        revisions count as duplicates too.
+        """
+        # Exclusive against other ingests/compactions and against running renders
+        with folder_lock(self.saved_sections):
+            self.index.refresh()
+            known_hashes = self.index.hashes() | self.revisions.hashes()
+            results = BulkIngest(self.saved_sections, known_hashes, workers, normalize_file).run(files)
+            self.index.refresh()
+            # Renders then skip validating the stored content again
+            self.index.mark_valid(result.sha256 for result in results if result.status == 'moved')
+        return results
+    
+    def print_ingest_result(self, result, moved_label):
+        if result.status == 'moved':
+            print(f"  {Colors.GREEN}✅ {moved_label}:{Colors.END} {result.source.name} → {result.dest.name}")
+        elif result.status == 'duplicate':
+            print(f"  {Colors.YELLOW}♻️  Duplicate skipped:{Colors.END} {result.source.name}")
+        elif result.status == 'quarantined':
+            print(f"  {Colors.RED}🚫 Quarantined:{Colors.END} {result.source.name} - {result.error}")
+        else:
+            print(f"  {Colors.RED}❌ Error:{Colors.END} {result.source.name} - {result.error}")
+    
+    def validate_saved_sections(self):
+        """Check every saved file against the section schema and quarantine invalid ones"""
+        print(f"\n{Colors.BLUE}🔎 Validating saved sections...{Colors.END}")
+        moved = []
+        valid = []
+        with folder_lock(self.saved_sections):
+            self.index.refresh()
+            for record in self.index.files():
+                try:
+                    normalize_file(self.index.path(record))
+                    valid.append(record['sha256'])
+                except SchemaError as e:
+                    quarantine(self.index.path(record), self.saved_sections / QUARANTINE_FOLDER, e)
+                    print(f"  {Colors.RED}🚫 Quarantined:{Colors.END} {record['name']} - {e}")
+                    moved.append(record['name'])
+            self.index.refresh()
+            self.index.mark_valid(valid)
+        print(f"\n{Colors.GREEN}✅ {self.index.count()} valid files, {len(moved)} quarantined{Colors.END}")
+        return moved
+    
+    def list_saved_sections(self, limit=None, offset=0, as_json=False):
         """Display list of saved sections"""
+        self.index.refresh()
+        records = self.index.files(limit=limit, offset=offset)
+        
+        if as_json:
+            print(json.dumps([record_summary(record) for record in records], indent=2))
+            return records
+        
         print(f"\n{Colors.BLUE}📋 Saved Sections:{Colors.END}")
         print("=" * 60)
         
-        json_files = list(self.saved_sections.glob("*.json"))
-        
-        if not json_files:
+        if not records:
             print(f"{Colors.YELLOW}⚠️  No saved sections found{Colors.END}")
-            return
-        
-        # Sort by modification date
-        json_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+            return records
         
-        print(f"\n{Colors.GREEN}Found {len(json_files)} files:{Colors.END}\n")
+        total = self.index.count()
+        print(f"\n{Colors.GREEN}Found {total} files:{Colors.END}\n")
         
-        for file in json_files:
-            modified = datetime.fromtimestamp(file.stat().st_mtime)
-            size_kb = file.stat().st_size / 1024
+        for record in records:
+            modified = datetime.fromtimestamp(record['mtime_ns'] / 1e9)
+            size_kb = record['size'] / 1024
             
-            print(f"  📄 {Colors.BOLD}{file.name}{Colors.END}")
+            invalid = f"  {Colors.RED}[INVALID]{Colors.END}" if record['kind'] == KIND_INVALID else ""
+            print(f"  📄 {Colors.BOLD}{record['name']}{Colors.END}{invalid}")
             print(f"     Modified: {modified.strftime('%Y-%m-%d %H:%M:%S')}")
             print(f"     Size: {size_kb:.1f} KB")
             print()
+        
+        shown = offset + len(records)
+        if shown < total:
+            print(f"… showing {offset + 1}-{shown} of {total} files (use --offset {shown} for more)")
+        
+        return records
+    
+    def compact_revisions(self, keep_last=1, newer_than_days=None):
+        """Pack older revisions into compressed segments, keeping latest ones hot"""
+        print(f"\n{Colors.BLUE}🗜️  Compacting saved sections...{Colors.END}")
+        newer_than = newer_than_days * 24 * 3600 if newer_than_days is not None else None
+        with folder_lock(self.saved_sections):
+            archived = self.revisions.compact(keep_last, newer_than)
+        stats = self.revisions.stats()
+        
+        print(f"{Colors.GREEN}✅ Archived {archived} revisions{Colors.END}")
+        print(f"   Hot files: {stats['hot_files']}")
+        print(f"   Archived revisions: {stats['archived_revisions']} "
+              f"({stats['archived_raw_bytes'] / 1024:.1f} KB → {stats['segment_bytes'] / 1024:.1f} KB "
+              f"in {stats['segments']} segments)")
+        return archived
+    
+    def restore_revision(self, name):
+        """Bring an archived revision back into saved_sections"""
+        with folder_lock(self.saved_sections):
+            path = self.revisions.restore(name)
+        if path is None:
+            print(f"{Colors.RED}❌ Unknown revision: {name}{Colors.END}")
+            return None
+        print(f"{Colors.GREEN}✅ Restored:{Colors.END} {path}")
+        return path
+    
+    def show_history(self, section_id):
+        """List every revision of a section, hot and archived"""
+        revisions = self.revisions.history(section_id)
+        print(f"\n{Colors.BLUE}🕘 History of {section_id}:{Colors.END} {len(revisions)} revisions\n")
+        for record in revisions:
+            modified = datetime.fromtimestamp(record['mtime_ns'] / 1e9)
+            where = "archived" if record['archived'] else "hot"
+            print(f"  📄 {record['name']}  ({where}, {modified.strftime('%Y-%m-%d %H:%M:%S')}, "
+                  f"{record['author'] or 'Unknown'})")
+        return revisions
     
-    def watch_downloads(self, interval=5):
+    def auto_move(self, files):
+        """Move newly detected files to saved_sections without confirmation"""
+        print(f"\n{Colors.GREEN}✅ New file detected!{Colors.END}")
+        for result in self.ingest(files):
+            self.print_ingest_result(result, "Auto-moved")
+    
+    def watch_downloads(self, interval=5, debounce=0.2):
         """Watch Downloads folder for new files and auto-move"""
         print(f"\n{Colors.BLUE}👀 Watching Downloads folder...{Colors.END}")
+        
+        try:
+            watcher = InotifyWatcher(str(self.downloads_folder))
+        except InotifyUnavailable as e:
+            print(f"   inotify unavailable ({e}), polling instead")
+            watcher = None
+        
+        try:
+            if watcher is not None:
+                with watcher:
+                    self.watch_downloads_inotify(watcher, debounce)
+            else:
+                self.watch_downloads_polling(interval)
+        except KeyboardInterrupt:
+            print(f"\n\n{Colors.YELLOW}👋 Stopped watching{Colors.END}")
+    
+    def watch_downloads_inotify(self, watcher, debounce=0.2):
+        """React to finished writes/renames in Downloads (Linux inotify)"""
+        print(f"   Mode: inotify (debounce {debounce * 1000:.0f} ms)")
+        print(f"   Press Ctrl+C to stop\n")
+        
+        while True:
+            names = watcher.wait_for_batch(debounce)
+            
+            if watcher.overflowed:
+                # Events were lost, fall back to a full scan once
+                watcher.overflowed = False
+                files = self.find_json_files_in_downloads()
+            else:
+                pattern = self.download_pattern()
+                files = [self.downloads_folder / name for name in sorted(names) if pattern.fullmatch(name)]
+                files = [file for file in files if file.exists()]
+            
+            if files:
+                self.auto_move(files)
+    
+    def watch_downloads_polling(self, interval=5):
+        """Poll Downloads folder every interval seconds"""
         print(f"   Interval: {interval} seconds")
         print(f"   Press Ctrl+C to stop\n")
         
         seen_files = set(self.find_json_files_in_downloads())
         
+        while True:
+            time.sleep(interval)
+            current_files = set(self.find_json_files_in_downloads())
+            new_files = current_files - seen_files
+            
+            if new_files:
+                self.auto_move(new_files)
+                seen_files = current_files
+            else:
+                print(f"{Colors.BLUE}.{Colors.END}", end='', flush=True)
+    
+    def watch_and_build(self, reports_file=None, backend=None, interval=1, debounce=0.3):
+        """Watch Downloads and saved_sections, re-rendering reports whose sections changed"""
+        from report_builder import ReportBuilder, load_targets
+        from report_generator import ReportGenerator
+        
+        generator = ReportGenerator(self.project_folder, data_folder=self.saved_sections, backend=backend,
+                                    template_path=self.template_path)
+        targets = load_targets(reports_file, self.project_folder) if reports_file else None
+        builder = ReportBuilder(generator, targets)
+        
+        print(f"\n{Colors.BLUE}👀 Watching Downloads and saved_sections (build mode)...{Colors.END}")
+        for _, output_name in builder.targets:
+            print(f"   Target: {output_name}")
+        builder.build()
+        
         try:
-            while True:
-                time.sleep(interval)
-                current_files = set(self.find_json_files_in_downloads())
-                new_files = current_files - seen_files
-                
-                if new_files:
-                    print(f"\n{Colors.GREEN}✅ New file detected!{Colors.END}")
-                    for file in new_files:
-                        try:
-                            dest = self.saved_sections / file.name
-                            if dest.exists():
-                                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                                base_name = dest.stem
-                                dest = self.saved_sections / f"{base_name}_{timestamp}.json"
-                            
-                            shutil.move(str(file), str(dest))
-                            print(f"  {Colors.GREEN}✅ Auto-moved:{Colors.END} {file.name}")
-                        except Exception as e:
-                            print(f"  {Colors.RED}❌ Error:{Colors.END} {e}")
-                    
-                    seen_files = current_files
-                else:
-                    print(f"{Colors.BLUE}.{Colors.END}", end='', flush=True)
+            watcher = InotifyWatcher(str(self.downloads_folder))
+            # Ingest places files with hard links (IN_CREATE only); compaction and quarantine remove them
+            watcher.add_folder(str(self.saved_sections),
+                               IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MOVED_FROM)
+        except InotifyUnavailable as e:
+            print(f"   inotify unavailable ({e}), polling instead")
+            watcher = None
         
+        try:
+            if watcher is not None:
+                with watcher:
+                    self.build_on_events(watcher, builder, debounce)
+            else:
+                self.build_on_poll(builder, interval)
         except KeyboardInterrupt:
             print(f"\n\n{Colors.YELLOW}👋 Stopped watching{Colors.END}")
+    
+    def build_on_events(self, watcher, builder, debounce=0.3):
+        """Move new downloads and rebuild after each debounced burst of events"""
+        print(f"   Mode: inotify (debounce {debounce * 1000:.0f} ms)")
+        print(f"   Press Ctrl+C to stop\n")
+        
+        downloads = str(self.downloads_folder)
+        saved_sections = str(self.saved_sections)
+        while True:
+            events = watcher.wait_for_events(debounce)
+            
+            if watcher.overflowed:
+                watcher.overflowed = False
+                files = self.find_json_files_in_downloads()
+                changed = True
+            else:
+                pattern = self.download_pattern()
+                files = [self.downloads_folder / name for folder, name in sorted(events)
+                         if folder == downloads and pattern.fullmatch(name)]
+                files = [file for file in files if file.exists()]
+                changed = any(folder == saved_sections and name.endswith('.json') and not name.startswith('.')
+                              for folder, name in events)
+            
+            if files:
+                self.auto_move(files)
+            if files or changed:
+                builder.build()
+    
+    def build_on_poll(self, builder, interval=1):
+        """Poll Downloads and saved_sections every interval seconds"""
+        print(f"   Interval: {interval} seconds")
+        print(f"   Press Ctrl+C to stop\n")
+        
+        seen_files = set(self.find_json_files_in_downloads())
+        while True:
+            time.sleep(interval)
+            current_files = set(self.find_json_files_in_downloads())
+            new_files = current_files - seen_files
+            if new_files:
+                self.auto_move(new_files)
+            seen_files = current_files
+            # Cheap when nothing changed: incremental index refresh and hash compare
+            builder.build()
+
+
+# Options that take a value (--name value or --name=value)
+VALUE_OPTIONS = {'folder', 'tenant', 'limit', 'offset', 'keep', 'days', 'reports', 'backend'}
 
 
 def main():
     """Main program function"""
-    print("=" * 60)
-    print(f"{Colors.BOLD}   File Manager - Reporting System{Colors.END}")
-    print("=" * 60)
+    args, options = parse_args(sys.argv[1:], VALUE_OPTIONS)
+    as_json = bool(options.get('json'))
     
-    manager = FileManager()
+    if not as_json:
+        print("=" * 60)
+        print(f"{Colors.BOLD}   File Manager - Reporting System{Colors.END}")
+        print("=" * 60)
     
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
+    folder = options.get('folder', DEFAULT_PROJECT_FOLDER)
+    if 'tenant' in options:
+        try:
+            manager = Workspace(folder, options['tenant']).file_manager()
+        except ValueError as e:
+            print(f"{Colors.RED}❌ {e}{Colors.END}")
+            sys.exit(1)
+    else:
+        manager = FileManager(folder)
+    
+    if args:
+        command = args[0]
         
         if command == "move":
             manager.move_files_from_downloads()
         elif command == "list":
-            manager.list_saved_sections()
+            limit = int(options['limit']) if 'limit' in options else None
+            manager.list_saved_sections(limit, int(options.get('offset', 0)), as_json)
+        elif command == "compact":
+            days = float(options['days']) if 'days' in options else None
+            manager.compact_revisions(int(options.get('keep', 1)), days)
+        elif command == "validate":
+            manager.validate_saved_sections()
+        elif command == "restore" and len(args) > 1:
+            manager.restore_revision(args[1])
+        elif command == "history" and len(args) > 1:
+            manager.show_history(args[1])
+        elif command == "watch" and options.get('build'):
+            interval = int(args[1]) if len(args) > 1 else 1
+            manager.watch_and_build(options.get('reports'), options.get('backend'), interval)
         elif command == "watch":
-            interval = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+            interval = int(args[1]) if len(args) > 1 else 5
             manager.watch_downloads(interval)
         else:
             print(f"{Colors.RED}❌ Unknown command: {command}{Colors.END}")
             print("\nAvailable commands:")
             print("  python file_manager.py move         - Move files from Downloads")
-            print("  python file_manager.py list         - List saved sections")
-            print("  python file_manager.py watch [sec]  - Watch Downloads (auto-move)")
+            print("  python file_manager.py list         - List saved sections ([--limit N] [--offset N] [--json])")
+            print("  python file_manager.py watch [sec]  - Watch Downloads (auto-move; inotify on Linux, else poll every sec)")
+            print("  python file_manager.py watch --build [--reports FILE] [--backend NAME]")
+            print("                                      - Also re-render reports when their sections change")
+            print("  python file_manager.py validate     - Quarantine saved files that fail the section schema")
+            print("  python file_manager.py compact [--keep N] [--days D] - Archive older revisions")
+            print("  python file_manager.py restore <file>  - Restore archived revision")
+            print("  python file_manager.py history <section> - List all revisions of a section")
+            print("\n  --folder <path>  Project folder (default: c:/repos/report)")
+            print("  --tenant <name>  Use the tenant's workspace (<folder>/workspaces/<name>)")
     else:
         # Interactive mode
         print(f"\n{Colors.BOLD}1.{Colors.END} Move files from Downloads")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Bulk Ingest - Reporting System
+Parallel, atomic and deduplicating move of report files into saved_sections
+(optionally validated and normalized, with invalid files quarantined)
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from render_cache import file_sha256
+from section_schema import SchemaError
+
+DEFAULT_WORKERS = 8
+QUARANTINE_FOLDER = ".quarantine"
+
+
+class IngestResult:
+    """Outcome of ingesting one file"""
+    
+    def __init__(self, source, status, dest=None, error=None, sha256=None):
+        self.source = Path(source)
+        self.status = status  # 'moved', 'duplicate', 'quarantined' or 'error'
+        self.dest = dest
+        self.error = error
+        self.sha256 = sha256
+
+
+def candidate_names(name, now=None):
+    """Destination names to try: original, then timestamped with a counter"""
+    stem, suffix = os.path.splitext(name)
+    timestamp = (now or datetime.now()).strftime('%Y%m%d_%H%M%S')
+    yield name
+    yield f"{stem}_{timestamp}{suffix}"
+    counter = 1
+    while True:
+        yield f"{stem}_{timestamp}_{counter}{suffix}"
+        counter += 1
+
+
+def link_no_clobber(source, dest_folder, name):
+    """Hard-link source into dest_folder under the first free name; returns dest"""
+    for candidate in candidate_names(name):
+        dest = Path(dest_folder) / candidate
+        try:
+            os.link(source, dest)
+            return dest
+        except FileExistsError:
+            continue
+
+
+def claim_name(dest_folder, name):
+    """Create an empty placeholder under the first free name in dest_folder; returns its path
+    
+    The placeholder is created with O_EXCL, so no two writers get the same
+    name; the caller then replaces it with the real file.
+    """
+    for candidate in candidate_names(name):
+        dest = Path(dest_folder) / candidate
+        try:
+            os.close(os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+            return dest
+        except FileExistsError:
+            continue
+
+
+def quarantine(source, folder, error):
+    """Move a rejected file into folder under a free name, with an .error note; returns dest"""
+    source = Path(source)
+    folder = Path(folder)
+    folder.mkdir(exist_ok=True)
+    try:
+        dest = link_no_clobber(source, folder, source.name)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        # Other filesystem or no hard links: move over a claimed placeholder
+        dest = claim_name(folder, source.name)
+        shutil.move(str(source), str(dest))
+    else:
+        source.unlink()
+    dest.with_name(dest.name + ".error").write_text(f"{error}\n", encoding='utf-8')
+    return dest
+
+
+class BulkIngest:
+    """Move files into a folder, skipping byte-identical duplicates
+    
+    Same-filesystem moves are a hard link plus unlink of the source, which is
+    atomic and never overwrites an existing file. Cross-device moves copy to a
+    temporary name in the destination folder first, so a partially copied file
+    is never visible under its final name.
+    
+    With normalize (source path -> new content bytes), the normalized
+    content is stored instead of the source. It is a duplicate when either
+    its hash or the hash of the source bytes is known, so raw files stored
+    before normalization still match their re-downloads.
+    Sources it rejects with SchemaError are moved to the quarantine folder.
+    """
+    
+    def __init__(self, dest_folder, known_hashes=(), workers=DEFAULT_WORKERS, normalize=None):
+        self.dest_folder = Path(dest_folder)
+        self.quarantine_folder = self.dest_folder / QUARANTINE_FOLDER
+        self.workers = workers
+        self.normalize = normalize
+        self._claimed = set(known_hashes)
+        self._lock = threading.Lock()
+        self._dest_dev = os.stat(self.dest_folder).st_dev
+    
+    def _claim(self, hashes):
+        """Reserve content hashes; False if any is already stored or being stored"""
+        with self._lock:
+            if not self._claimed.isdisjoint(hashes):
+                return False
+            self._claimed.update(hashes)
+            return True
+    
+    def _release(self, hashes):
+        with self._lock:
+            self._claimed.difference_update(hashes)
+    
+    def _place(self, source):
+        """Atomically place source in dest folder under a free name"""
+        if os.stat(source).st_dev == self._dest_dev:
+            try:
+                return link_no_clobber(source, self.dest_folder, source.name)
+            except OSError as e:
+                # Filesystems without hard links (e.g. some network/FAT mounts)
+                if e.errno not in (errno.EPERM, errno.ENOTSUP, errno.EXDEV, errno.EMLINK):
+                    raise
+        
+        return self._place_copy(source, lambda dst: self._copy_from(source, dst))
+    
+    def _place_content(self, source, content):
+        """Atomically place content under source's name, keeping source's mtime"""
+        return self._place_copy(source, lambda dst: dst.write(content))
+    
+    @staticmethod
+    def _copy_from(source, dst):
+        with open(source, 'rb') as src:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+    
+    def _place_copy(self, source, write):
+        """Write a temporary file with write(f) and link it under a free name"""
+        tmp = self.dest_folder / f".{source.name}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, 'xb') as dst:
+                write(dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+            shutil.copystat(source, tmp)
+            try:
+                return link_no_clobber(tmp, self.dest_folder, source.name)
+            except OSError:
+                # No hard links at all: rename over a claimed placeholder
+                dest = claim_name(self.dest_folder, source.name)
+                try:
+                    os.replace(tmp, dest)
+                except OSError:
+                    dest.unlink()
+                    raise
+                return dest
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+    
+    def ingest_one(self, source):
+        source = Path(source)
+        sha256 = None
+        try:
+            content = None
+            sha256 = file_sha256(source)
+            hashes = {sha256}
+            if self.normalize is not None:
+                try:
+                    content = self.normalize(source)
+                except SchemaError as e:
+                    dest = quarantine(source, self.quarantine_folder, e)
+                    return IngestResult(source, 'quarantined', dest=dest, error=e)
+                sha256 = hashlib.sha256(content).hexdigest()
+                hashes.add(sha256)
+            if not self._claim(hashes):
+                # Byte-identical copy already stored; drop the re-download
+                source.unlink()
+                return IngestResult(source, 'duplicate', sha256=sha256)
+            try:
+                dest = self._place(source) if content is None else self._place_content(source, content)
+            except Exception:
+                self._release(hashes)
+                raise
+            source.unlink()
+            return IngestResult(source, 'moved', dest=dest, sha256=sha256)
+        except Exception as e:
+            return IngestResult(source, 'error', error=e, sha256=sha256)
+    
+    def run(self, files):
+        """Ingest files in parallel; returns IngestResult list in input order"""
+        files = list(files)
+        if len(files) <= 1 or self.workers <= 1:
+            return [self.ingest_one(file) for file in files]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(self.ingest_one, files))
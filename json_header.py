@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+JSON Header Reader - Reporting System
+Streaming parse of section JSON files that skips large values (e.g. "fields")
+"""
+
+import codecs
+import hashlib
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+STRING_SPECIAL = re.compile(r'["\\]')
+CONTAINER_TOKEN = re.compile(r'["{}\[\]]')
+SCALAR_TOKEN = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null')
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Characters that can follow a scalar
+SCALAR_END = re.compile(r'[ \t\n\r,\]}]')
+# Closing quote or one complete escape sequence inside a string
+STRING_TOKEN = re.compile(r'"|\\(?:u[0-9a-fA-F]{4}|[^u])')
+HIGH_SURROGATE_ESCAPE = re.compile(r'\\u[dD][89abAB][0-9a-fA-F]{2}')
+
+
+class StreamingJSONReader:
+    """Recursive-descent JSON reader over a file read in chunks
+
+    Values of keys listed in skip_keys are scanned past without being
+    materialized. The content hash of the whole file is computed on the fly.
+    """
+
+    def __init__(self, f, skip_keys=('fields',)):
+        self.f = f
+        self.skip_keys = set(skip_keys)
+        self.decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.digest = hashlib.sha256()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Read next chunk into buffer; returns False at end of file"""
+        if self.eof:
+            return False
+        raw = self.f.read(CHUNK_SIZE)
+        self.digest.update(raw)
+        if not raw:
+            self.eof = True
+            self.buf = self.buf[self.pos:] + self.decoder.decode(b'', final=True)
+            self.pos = 0
+            return False
+        self.buf = self.buf[self.pos:] + self.decoder.decode(raw)
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        """Return next non-whitespace character without consuming it"""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON")
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+
+    def _scan_string(self, keep):
+        """Consume string starting at current quote; returns decoded text if keep"""
+        start = self.pos
+        search = self.pos + 1
+        while True:
+            match = STRING_SPECIAL.search(self.buf, search)
+            if match is None or (match.group() == '\\' and match.end() >= len(self.buf)):
+                # Need more data; only keep the string start when decoding it
+                resume = len(self.buf) if match is None else match.start()
+                anchor = start if keep else resume
+                self.pos = anchor
+                if not self._fill():
+                    raise ValueError("Unterminated string")
+                start = 0
+                search = resume - anchor
+                continue
+            if match.group() == '\\':
+                search = match.end() + 1
+                continue
+            self.pos = match.end()
+            return json.loads(self.buf[start:self.pos]) if keep else None
+
+    def _scan_container(self):
+        """Skip object/array starting at current bracket"""
+        depth = 0
+        while True:
+            match = CONTAINER_TOKEN.search(self.buf, self.pos)
+            if match is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError("Unterminated container")
+                continue
+            self.pos = match.start()
+            char = match.group()
+            if char == '"':
+                self._scan_string(keep=False)
+                continue
+            self.pos += 1
+            depth += 1 if char in '{[' else -1
+            if depth == 0:
+                return
+
+    def _scalar(self):
+        while True:
+            # Only a delimiter or the end of file ends the token (e.g. '12.' may go on as '12.5')
+            end = SCALAR_END.search(self.buf, self.pos)
+            if end is None and self._fill():
+                continue
+            token = self.buf[self.pos:end.start() if end else len(self.buf)]
+            if not SCALAR_TOKEN.fullmatch(token):
+                raise ValueError(f"Invalid JSON value at offset {self.pos}")
+            self.pos += len(token)
+            return json.loads(token)
+
+    def iter_string(self):
+        """Yield decoded pieces of the string starting at current quote
+
+        Pieces are cut between escape sequences (never between the halves of
+        a surrogate pair), so memory stays at about one chunk.
+        """
+        self._expect('"')
+        while True:
+            search = self.pos
+            last = None
+            while True:
+                match = STRING_TOKEN.search(self.buf, search)
+                if match is None or match.group() == '"':
+                    break
+                last = match
+                search = match.end()
+
+            if match is not None:
+                piece = self.buf[self.pos:match.start()]
+                self.pos = match.end()
+                if piece:
+                    yield json.loads('"' + piece + '"')
+                return
+
+            # No closing quote yet: emit up to the last complete escape
+            backslash = self.buf.find('\\', search)
+            safe = backslash if backslash != -1 else len(self.buf)
+            if safe == search and last is not None and HIGH_SURROGATE_ESCAPE.fullmatch(last.group()):
+                safe = last.start()
+            if safe > self.pos:
+                piece = self.buf[self.pos:safe]
+                self.pos = safe
+                yield json.loads('"' + piece + '"')
+            if not self._fill():
+                raise ValueError("Unterminated string")
+
+    def seek_key(self, key):
+        """Move into current object to the value of key (KeyError if missing)"""
+        self._expect('{')
+        if self._peek() == '}':
+            raise KeyError(key)
+        while True:
+            if self._peek() != '"':
+                raise ValueError(f"Expected key at offset {self.pos}")
+            name = self._scan_string(keep=True)
+            self._expect(':')
+            if name == key:
+                return
+            self.skip_value()
+            char = self._peek()
+            self.pos += 1
+            if char == '}':
+                raise KeyError(key)
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' at offset {self.pos - 1}")
+
+    def iter_keys(self):
+        """Yield keys of the object at current position, skipping their values"""
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            if self._peek() != '"':
+                raise ValueError(f"Expected key at offset {self.pos}")
+            key = self._scan_string(keep=True)
+            self._expect(':')
+            yield key
+            self.skip_value()
+            char = self._peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"Expected ',' or '}}' at offset {self.pos - 1}")
+
+    def skip_value(self):
+        char = self._peek()
+        if char == '"':
+            self._scan_string(keep=False)
+        elif char in '{[':
+            self._scan_container()
+        else:
+            self._scalar()
+
+    def read_value(self):
+        char = self._peek()
+        if char == '{':
+            self.pos += 1
+            result = {}
+            if self._peek() == '}':
+                self.pos += 1
+                return result
+            while True:
+                if self._peek() != '"':
+                    raise ValueError(f"Expected key at offset {self.pos}")
+                key = self._scan_string(keep=True)
+                self._expect(':')
+                if key in self.skip_keys:
+                    self.skip_value()
+                else:
+                    result[key] = self.read_value()
+                char = self._peek()
+                self.pos += 1
+                if char == '}':
+                    return result
+                if char != ',':
+                    raise ValueError(f"Expected ',' or '}}' at offset {self.pos - 1}")
+        if char == '[':
+            self.pos += 1
+            result = []
+            if self._peek() == ']':
+                self.pos += 1
+                return result
+            while True:
+                result.append(self.read_value())
+                char = self._peek()
+                self.pos += 1
+                if char == ']':
+                    return result
+                if char != ',':
+                    raise ValueError(f"Expected ',' or ']' at offset {self.pos - 1}")
+        if char == '"':
+            return self._scan_string(keep=True)
+        return self._scalar()
+
+    def finish(self):
+        """Consume rest of file (for the content hash) and check for trailing data"""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                raise ValueError(f"Extra data at offset {self.pos}")
+            if not self._fill():
+                return self.digest.hexdigest()
+
+
+def read_metadata(path, skip_keys=('fields',)):
+    """Parse JSON file without materializing skipped keys
+
+    Returns (data, sha256 of the whole file). Raises ValueError on invalid JSON.
+    """
+    with open(path, 'rb') as f:
+        reader = StreamingJSONReader(f, skip_keys)
+        data = reader.read_value()
+        return data, reader.finish()
+
+
+def _open_at(f, key_path):
+    reader = StreamingJSONReader(f, skip_keys=())
+    for key in key_path:
+        reader.seek_key(key)
+    return reader
+
+
+class LazyJSONString:
+    """String value inside a JSON file, read only when iterated
+
+    Iterating yields decoded pieces of about CHUNK_SIZE characters, so the
+    value is never held in memory as a whole.
+    """
+
+    def __init__(self, path, key_path):
+        self.path = path
+        self.key_path = tuple(key_path)
+
+    def __iter__(self):
+        with open(self.path, 'rb') as f:
+            reader = _open_at(f, self.key_path)
+            if reader._peek() == '"':
+                yield from reader.iter_string()
+            else:
+                yield reader.read_value()
+
+    def read(self):
+        """Whole value as one string"""
+        return ''.join(self)
+
+
+def lazy_object(path, key_path):
+    """{key: LazyJSONString} for the object at key_path, without reading its values"""
+    with open(path, 'rb') as f:
+        keys = list(_open_at(f, key_path).iter_keys())
+    return {key: LazyJSONString(path, tuple(key_path) + (key,)) for key in keys}
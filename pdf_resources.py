@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+PDF Resources - Reporting System
+Render state reused across PDFs: WeasyPrint stylesheets, fonts and fetched
+assets, and one wkhtmltopdf process for a whole batch of pdfkit renders
+"""
+
+import os
+import subprocess
+import threading
+from urllib.parse import unquote, urlparse
+
+MAX_CACHED_ASSETS = 256
+
+
+class WeasyPrintResources:
+    """Parsed stylesheets, font configuration and fetched assets for WeasyPrint
+
+    Parsing the PDF stylesheet, loading fonts (including @font-face rules)
+    and fetching images or CSS referenced by the report are the same for
+    every render, so they are done once and shared. Local files are fetched
+    again when their mtime or size changes.
+    """
+
+    def __init__(self):
+        try:
+            from weasyprint.text.fonts import FontConfiguration
+        except ImportError:  # WeasyPrint < 53
+            from weasyprint.fonts import FontConfiguration
+        self.font_config = FontConfiguration()
+        self._stylesheets = {}
+        self._assets = {}
+
+    def stylesheet(self, css):
+        """Parsed CSS object for a stylesheet string"""
+        stylesheet = self._stylesheets.get(css)
+        if stylesheet is None:
+            from weasyprint import CSS
+            stylesheet = self._stylesheets[css] = CSS(string=css, font_config=self.font_config)
+        return stylesheet
+
+    def _asset_key(self, url):
+        parsed = urlparse(url)
+        if parsed.scheme == 'data':
+            return None
+        if parsed.scheme == 'file':
+            try:
+                stat = os.stat(unquote(parsed.path))
+            except OSError:
+                return None
+            return url, stat.st_mtime_ns, stat.st_size
+        return url, None, None
+
+    def url_fetcher(self, url, *args, **kwargs):
+        """default_url_fetcher with fetched assets kept in memory"""
+        from weasyprint import default_url_fetcher
+        key = self._asset_key(url)
+        if key is None:
+            return default_url_fetcher(url, *args, **kwargs)
+
+        cached = self._assets.get(key)
+        if cached is None:
+            result = default_url_fetcher(url, *args, **kwargs)
+            if not isinstance(result, dict):
+                return result
+            cached = dict(result)
+            file_obj = cached.pop('file_obj', None)
+            if file_obj is not None:
+                with file_obj:
+                    cached['string'] = file_obj.read()
+            if len(self._assets) >= MAX_CACHED_ASSETS:
+                del self._assets[next(iter(self._assets))]
+            self._assets[key] = cached
+        return dict(cached)
+
+    def render(self, output_path, css, html_content=None, html_file=None, base_url=None):
+        """Render an HTML string or file to output_path"""
+        from weasyprint import HTML
+        if html_file is not None:
+            document = HTML(filename=str(html_file), base_url=base_url, url_fetcher=self.url_fetcher)
+        else:
+            document = HTML(string=html_content, base_url=base_url, url_fetcher=self.url_fetcher)
+        document.write_pdf(output_path, stylesheets=[self.stylesheet(css)], font_config=self.font_config)
+
+
+# One set per thread: WeasyPrint's font configuration is not thread-safe
+_weasyprint_local = threading.local()
+
+
+def get_weasyprint_resources():
+    """Return this thread's WeasyPrint resources, created on first use"""
+    resources = getattr(_weasyprint_local, 'resources', None)
+    if resources is None:
+        resources = _weasyprint_local.resources = WeasyPrintResources()
+    return resources
+
+
+def wkhtmltopdf_binary():
+    """Path of the wkhtmltopdf binary pdfkit would use"""
+    import pdfkit
+    binary = pdfkit.configuration().wkhtmltopdf
+    return binary.decode('utf-8') if isinstance(binary, bytes) else binary
+
+
+def quote_arg(arg):
+    """Quote an argument for a wkhtmltopdf --read-args-from-stdin line"""
+    return '"' + str(arg).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class WkhtmltopdfBatch:
+    """Render many HTML files with a single wkhtmltopdf process
+
+    Each (html file, output path) pair is one line on stdin of
+    `wkhtmltopdf --read-args-from-stdin`, so Qt/WebKit starts once for the
+    whole batch instead of once per PDF. Options apply to every line.
+    """
+
+    def __init__(self, options=('--quiet',), binary=None):
+        self.options = list(options)
+        self.binary = binary
+
+    def render(self, pairs):
+        """Render (html_file, output_path) pairs; returns {output_path: error} for failures"""
+        pairs = [(str(html_file), str(output_path)) for html_file, output_path in pairs]
+        if not pairs:
+            return {}
+        for _, output_path in pairs:
+            if os.path.exists(output_path):
+                os.unlink(output_path)
+
+        lines = ''.join(f"{quote_arg(html_file)} {quote_arg(output_path)}\n" for html_file, output_path in pairs)
+        process = subprocess.run(
+            [self.binary or wkhtmltopdf_binary(), *self.options, '--read-args-from-stdin'],
+            input=lines.encode('utf-8'),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+        # wkhtmltopdf goes on after a failed line, so check every output
+        stderr = process.stderr.decode('utf-8', 'replace').strip()
+        errors = {}
+        for _, output_path in pairs:
+            if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+                errors[output_path] = stderr.splitlines()[-1] if stderr else \
+                    f"wkhtmltopdf exited with code {process.returncode}"
+        return errors
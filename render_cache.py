@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Render Cache - Reporting System
+Reuses generated PDFs when template, backend, CSS and section contents are unchanged
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+
+def file_sha256(path):
+    """Content hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def place_file(source, dest):
+    """Hard-link source to dest, copying when linking is not possible"""
+    dest = Path(dest)
+    if dest.exists() and os.path.samefile(source, dest):
+        return
+    tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copyfile(source, tmp)
+    os.replace(tmp, dest)
+
+
+class RenderCache:
+    """Content-addressed store of rendered PDFs with size/age eviction"""
+
+    def __init__(self, cache_folder, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.cache_folder = Path(cache_folder)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.cache_folder.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(template_digest, backend, css, section_hashes):
+        """Build cache key from everything that affects the rendered PDF"""
+        payload = json.dumps({
+            'template': template_digest,
+            'backend': backend,
+            'css': hashlib.sha256(css.encode('utf-8')).hexdigest(),
+            'sections': section_hashes,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def entry_path(self, key):
+        return self.cache_folder / f"{key}.pdf"
+
+    def fetch(self, key, output_path):
+        """Place cached PDF at output_path; returns False on cache miss"""
+        entry = self.entry_path(key)
+        try:
+            place_file(entry, output_path)
+        except FileNotFoundError:
+            return False
+        # Touch entry so eviction treats it as recently used
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            pass  # evicted by another process; output_path already has the PDF
+        return True
+
+    def release(self, output_path):
+        """Unlink output_path if it shares an inode with a cache entry
+
+        Backends write PDFs in place, which would otherwise overwrite the
+        hard-linked cache entry as well.
+        """
+        try:
+            if os.stat(output_path).st_nlink > 1:
+                os.unlink(output_path)
+        except FileNotFoundError:
+            pass
+
+    def store(self, key, pdf_path):
+        """Add rendered PDF to cache and evict old entries"""
+        place_file(pdf_path, self.entry_path(key))
+        self.evict()
+
+    def evict(self):
+        """Remove entries older than max_age, then oldest until under max_bytes"""
+        now = time.time()
+        entries = []
+        with os.scandir(self.cache_folder) as it:
+            for entry in it:
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                    if self.max_age is not None and now - stat.st_mtime > self.max_age:
+                        os.unlink(entry.path)
+                        continue
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        if self.max_bytes is None:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Report Builder - Reporting System
+Re-renders only the reports whose section inputs changed (used by watch --build)
+"""
+
+import json
+import os
+from pathlib import Path
+
+from file_lock import folder_lock, output_lock
+from render_cache import RenderCache
+from report_generator import PDF_CSS
+from template_engine import load_template
+
+DEFAULT_BUILD_OUTPUT = "data_quality_report_latest.pdf"
+
+
+def load_targets(reports_file, report_folder):
+    """Read [{"template": ..., "output_name": ...}, ...] build targets from JSON"""
+    with open(reports_file, 'r', encoding='utf-8') as f:
+        reports = json.load(f)
+    return [
+        (Path(report.get('template', Path(report_folder) / "report_template.html")), report['output_name'])
+        for report in reports
+    ]
+
+
+class ReportBuilder:
+    """Keeps build targets (template, output name) up to date with saved sections
+
+    A target depends on the sections its template contains. Each build
+    compares the render cache key of every target (template, backend, CSS
+    and the hashes of the newest section revisions) with the key of its
+    last build, so a burst of saves leads to one render per affected
+    report and unrelated or identical saves lead to none.
+    """
+
+    def __init__(self, generator, targets=None):
+        self.generator = generator
+        self.targets = targets or [(generator.template_path, DEFAULT_BUILD_OUTPUT)]
+        self.built = {}  # output name -> (cache key, section hashes) of last build
+
+    def stale_targets(self):
+        """Targets whose inputs changed since their last build, with changed section ids"""
+        stale = []
+        for template_path, output_name in self.targets:
+            hashes = self.generator.source_hashes(template_path)
+            key = RenderCache.make_key(load_template(template_path).digest, self.generator.pdf_method,
+                                       PDF_CSS, hashes)
+            last_key, last_hashes = self.built.get(output_name, (None, {}))
+            if key == last_key:
+                continue
+            changed = sorted(section_id for section_id in set(hashes) | set(last_hashes)
+                             if hashes.get(section_id) != last_hashes.get(section_id))
+            stale.append((template_path, output_name, key, hashes, changed))
+        return stale
+
+    def build(self):
+        """Render stale targets; returns list of written paths"""
+        written = []
+        for template_path, output_name, key, hashes, changed in self.stale_targets():
+            if self.built and changed:
+                print(f"🔄 {output_name}: changed {', '.join(changed)}")
+            if self.generator.pdf_method == 'browser':
+                path = self.write_filled_html(template_path, output_name)
+            else:
+                path = self.render_target(template_path, output_name, key)
+            if path is not None:
+                self.built[output_name] = (key, hashes)
+                written.append(path)
+        return written
+
+    def render_target(self, template_path, output_name, key):
+        """Render one target with the PDF backend; returns its path, or None if the render failed
+
+        There is no fallback to the browser method here, so a failed target
+        is not recorded as built and is rendered again on the next build.
+        """
+        generator = self.generator
+        output_path = generator.output_folder / output_name
+        if generator.cache.fetch(key, output_path):
+            print(f"♻️  {output_name}: reused cached PDF")
+            return output_path
+
+        scratch = generator.scratch_path('.html')
+        try:
+            with output_lock(output_path):
+                with folder_lock(generator.data_folder, shared=True):
+                    generator.write_html(template_path, scratch)
+                generator.cache.release(output_path)
+                generator.render_pdf(None, output_path, html_file=scratch)
+                generator.cache.store(key, output_path)
+        except Exception as e:
+            print(f"❌ {output_name}: {type(e).__name__}: {e}")
+            return None
+        finally:
+            if scratch.exists():
+                scratch.unlink()
+        print(f"✅ PDF rebuilt: {output_path}")
+        return output_path
+
+    def write_filled_html(self, template_path, output_name):
+        """Without a PDF library, keep the filled HTML up to date instead"""
+        generator = self.generator
+        filled_html = (generator.output_folder / output_name).with_suffix('.html')
+        scratch = generator.scratch_path('.html')
+        try:
+            with folder_lock(generator.data_folder, shared=True):
+                generator.write_html(template_path, scratch)
+            os.replace(scratch, filled_html)
+        finally:
+            if scratch.exists():
+                scratch.unlink()
+        print(f"📄 Filled report updated: {filled_html}")
+        return filled_html
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Report Export - Reporting System
+Streams rendered reports and their source section JSON into one ZIP or tar
+archive with a manifest, resuming interrupted exports
+"""
+
+import hashlib
+import io
+import json
+import os
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+
+from file_lock import folder_lock, output_lock
+from json_header import read_metadata
+from render_cache import file_sha256
+from report_generator import PDF_BACKENDS, prepare_batch_job, worker_tracer
+from scheduler import FairScheduler
+from section_index import describe_section_file
+from template_engine import load_template
+
+COPY_CHUNK = 1024 * 1024
+MANIFEST_NAME = "manifest.jsonl"
+ARCHIVE_FORMATS = ('.zip', '.tar')
+
+# ZipInfo attributes kept in the journal to rebuild the central directory on resume
+ZIPINFO_FIELDS = ('filename', 'date_time', 'compress_type', 'comment', 'extra', 'create_system',
+                  'create_version', 'extract_version', 'reserved', 'flag_bits', 'volume',
+                  'internal_attr', 'external_attr', 'header_offset', 'CRC', 'compress_size', 'file_size')
+
+
+def job_key(job):
+    """Stable id of an export job, to recognize it when resuming"""
+    return hashlib.sha256(json.dumps(job, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def job_sources(generator, html_path, section_files=None):
+    """Section files a render of html_path uses: [{name, path, sha256, sections}]"""
+    sources = []
+    if section_files:
+        for path in section_files:
+            data, sha256 = read_metadata(path)
+            _, _, _, entries = describe_section_file(data)
+            sources.append({
+                'name': Path(path).name,
+                'path': str(Path(path).resolve()),
+                'sha256': sha256,
+                'sections': [{'id': section_id, 'author': author, 'timestamp': timestamp}
+                             for section_id, author, timestamp in entries],
+            })
+        return sources
+
+    generator.index.refresh()
+    by_name = {}
+    records = generator.index.latest_many(load_template(html_path).registry.section_ids)
+    for section_id, record in records.items():
+        if record is None:
+            continue
+        source = by_name.get(record['name'])
+        if source is None:
+            source = by_name[record['name']] = {
+                'name': record['name'],
+                'path': str(generator.index.path(record).resolve()),
+                'sha256': record['sha256'],
+                'sections': [],
+            }
+            sources.append(source)
+        source['sections'].append({'id': section_id, 'author': record['section_author'],
+                                   'timestamp': record['section_timestamp']})
+    return sources
+
+
+def run_export_job(report_folder, output_folder, job, backend=None, trace=False):
+    """Render one export job and list its sources (runs inside a worker process)
+
+    Sources are resolved under the same data folder lock as the HTML is
+    filled, so the manifest describes exactly the revisions in the PDF.
+    With trace set, the timed stages are returned under 'trace'.
+    """
+    tracer = worker_tracer(trace)
+    started = time.perf_counter()
+    result = {'output_name': job.get('output_name'), 'tenant': job.get('tenant'), 'status': 'ok'}
+    log = io.StringIO()
+
+    try:
+        with redirect_stdout(log):
+            generator, html_path, output_path = prepare_batch_job(report_folder, output_folder, job, backend, tracer)
+            if generator.pdf_method not in PDF_BACKENDS:
+                raise RuntimeError("No PDF library available")
+
+            section_files = job.get('sections')
+            html_content = None
+            with folder_lock(generator.data_folder, shared=True):
+                result['sources'] = job_sources(generator, html_path, section_files)
+                cache_key = generator.render_cache_key(html_path, section_files)
+                result['cached'] = not job.get('force') and generator.cache.fetch(cache_key, output_path)
+                if not result['cached']:
+                    all_data = generator.load_section_files(section_files) if section_files else None
+                    html_content = generator.inject_data_into_html(html_path, all_data)
+
+            if html_content is not None:
+                with output_lock(output_path):
+                    generator.cache.release(output_path)
+                    generator.render_pdf(html_content, output_path)
+                    generator.cache.store(cache_key, output_path)
+            result['output'] = str(output_path)
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+
+    result['duration'] = time.perf_counter() - started
+    result['log'] = log.getvalue()
+    if trace:
+        result['trace'] = tracer.hooks[0].events
+    return result
+
+
+def crash_result(job, error):
+    """Error result for a job whose worker did not return one"""
+    return {'output_name': job.get('output_name'), 'tenant': job.get('tenant'), 'status': 'error',
+            'error': f"{type(error).__name__}: {error}"}
+
+
+def zipinfo_to_dict(info):
+    return {
+        name: value.hex() if isinstance(value, bytes) else value
+        for name, value in ((name, getattr(info, name)) for name in ZIPINFO_FIELDS)
+    }
+
+
+def zipinfo_from_dict(fields):
+    info = zipfile.ZipInfo(fields['filename'], tuple(fields['date_time']))
+    for name in ZIPINFO_FIELDS[2:]:
+        value = fields[name]
+        setattr(info, name, bytes.fromhex(value) if name in ('comment', 'extra') else value)
+    return info
+
+
+class ExportArchive:
+    """Archive written member by member, which can continue after a crash
+
+    Members are streamed from files in chunks. After each checkpoint the
+    archive size is recorded in the journal; on resume the partial archive
+    is truncated back to the last checkpoint and writing goes on from
+    there. Tar keeps no per-member state in memory; ZIP keeps one small
+    central directory record per member until close.
+    """
+
+    def __init__(self, path, is_zip, checkpoint=None):
+        self.path = Path(path)
+        self.is_zip = is_zip
+        self._members = []  # ZipInfo of members written since last checkpoint
+        if checkpoint is None:
+            self.f = open(self.path, 'w+b')
+            offset = 0
+        else:
+            self.f = open(self.path, 'r+b')
+            offset = checkpoint['offset']
+            self.f.truncate(offset)
+            self.f.seek(offset)
+
+        if self.is_zip:
+            self.archive = zipfile.ZipFile(self.f, 'w', zipfile.ZIP_DEFLATED)
+            for fields in (checkpoint or {}).get('zip_members', ()):
+                info = zipinfo_from_dict(fields)
+                self.archive.filelist.append(info)
+                self.archive.NameToInfo[info.filename] = info
+        else:
+            self.archive = tarfile.open(fileobj=self.f, mode='w', format=tarfile.PAX_FORMAT)
+
+    def add_file(self, name, path, compress=True):
+        """Stream file into the archive; returns (sha256, size) of its content"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as src:
+            size = os.fstat(src.fileno()).st_size
+            mtime = os.fstat(src.fileno()).st_mtime
+            if self.is_zip:
+                info = zipfile.ZipInfo(name, time.localtime(mtime)[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+                info.file_size = size
+                with self.archive.open(info, 'w', force_zip64=size > zipfile.ZIP64_LIMIT) as dst:
+                    for chunk in iter(lambda: src.read(COPY_CHUNK), b''):
+                        digest.update(chunk)
+                        dst.write(chunk)
+                self._members.append(info)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = size
+                info.mtime = mtime
+                self.archive.addfile(info, _HashingReader(src, digest))
+                # Written members are not needed again; do not keep them all in memory
+                self.archive.members.clear()
+        return digest.hexdigest(), size
+
+    def checkpoint(self):
+        """Flush written members; returns journal data to resume from this point"""
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        checkpoint = {'offset': self.f.tell()}
+        if self.is_zip:
+            checkpoint['zip_members'] = [zipinfo_to_dict(info) for info in self._members]
+        self._members = []
+        return checkpoint
+
+    def close(self):
+        self.archive.close()
+        self.f.close()
+
+
+class _HashingReader:
+    """File wrapper hashing what tarfile reads from it"""
+
+    def __init__(self, f, digest):
+        self.f = f
+        self.digest = digest
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.digest.update(data)
+        return data
+
+
+class ReportExporter:
+    """Render jobs in parallel and stream finished PDFs with their sources into one archive
+
+    The archive is written to <archive>.partial next to a <archive>.journal
+    with one line per exported report (its manifest entry and a resume
+    checkpoint). Running the same export again after an interruption skips
+    reports already in the journal. Source JSON files shared by several
+    reports are stored once, under sources/<sha256>.json.
+    """
+
+    def __init__(self, generator, archive_path, workers=None):
+        self.generator = generator
+        self.archive_path = Path(archive_path)
+        if self.archive_path.suffix.lower() not in ARCHIVE_FORMATS:
+            raise ValueError(f"Archive must end with {' or '.join(ARCHIVE_FORMATS)}: {self.archive_path}")
+        self.partial_path = self.archive_path.with_name(self.archive_path.name + ".partial")
+        self.journal_path = self.archive_path.with_name(self.archive_path.name + ".journal")
+        self.workers = workers or os.cpu_count() or 1
+
+    def load_journal(self):
+        """(done job keys, archived source hashes, last checkpoint) from a previous run
+
+        A last line cut short by the interruption is dropped from the journal.
+        """
+        done, archived, checkpoint = set(), set(), None
+        if not (self.partial_path.exists() and self.journal_path.exists()):
+            return done, archived, checkpoint
+
+        zip_members = []
+        valid_end = 0
+        with open(self.journal_path, 'r+b') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                valid_end += len(line)
+                done.add(entry['job'])
+                archived.update(source['sha256'] for source in entry['manifest']['sources'])
+                zip_members.extend(entry['checkpoint'].get('zip_members', ()))
+                checkpoint = dict(entry['checkpoint'], zip_members=zip_members)
+            f.truncate(valid_end)
+        return done, archived, checkpoint
+
+    def source_member(self, source):
+        # Content-addressed, so identical files with different names are stored once
+        return f"sources/{source['sha256']}.json"
+
+    def report_member(self, result):
+        tenant = f"{result['tenant']}/" if result.get('tenant') else ""
+        return f"reports/{tenant}{result['output_name']}"
+
+    def archive_result(self, archive, result, archived):
+        """Write report and its not yet archived sources; returns manifest entry
+
+        Returns None without writing anything when a source file was
+        replaced after the render, since the PDF no longer matches it.
+        """
+        for source in result['sources']:
+            if source['sha256'] in archived:
+                continue
+            try:
+                if file_sha256(source['path']) != source['sha256']:
+                    return None
+            except FileNotFoundError:
+                # Archived by compaction or quarantined since the render
+                return None
+
+        member = self.report_member(result)
+        sha256, size = archive.add_file(member, result['output'], compress=False)
+        sources = []
+        for source in result['sources']:
+            source_entry = {
+                'file': self.source_member(source),
+                'name': source['name'],
+                'sha256': source['sha256'],
+                'sections': source['sections'],
+            }
+            if source['sha256'] not in archived:
+                archived_sha256, _ = archive.add_file(source_entry['file'], source['path'])
+                if archived_sha256 != source['sha256']:
+                    # Replaced while being copied; the export resumes from the last checkpoint
+                    raise RuntimeError(f"{source['name']} changed while it was being archived")
+                archived.add(source['sha256'])
+            sources.append(source_entry)
+        return {
+            'report': member,
+            'output_name': result['output_name'],
+            'tenant': result.get('tenant'),
+            'sha256': sha256,
+            'size': size,
+            'cached': bool(result.get('cached')),
+            'exported_at': datetime.now(timezone.utc).isoformat(),
+            'sources': sources,
+        }
+
+    def write_manifest(self, archive):
+        """Stream manifest entries from the journal into the archive"""
+        manifest = self.archive_path.with_name(f".{self.archive_path.name}.manifest.tmp")
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as src, \
+                    open(manifest, 'w', encoding='utf-8') as dst:
+                for line in src:
+                    dst.write(json.dumps(json.loads(line)['manifest']) + "\n")
+            archive.add_file(MANIFEST_NAME, manifest)
+        finally:
+            if manifest.exists():
+                manifest.unlink()
+
+    def run_jobs(self, jobs, job_ids, workers, finish):
+        """Render jobs in a new process pool, calling finish(job id, result) for each
+
+        Returns (job ids never started, {job id: error} for jobs whose
+        worker died) after a worker crash; both are empty otherwise.
+        """
+        render = partial(run_export_job, str(self.generator.report_folder),
+                         str(self.generator.output_folder), backend=self.generator.pdf_method,
+                         trace=self.generator.tracer.enabled)
+        finished = set()
+        crashed = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for n, future in FairScheduler(pool, workers).run([jobs[i] for i in job_ids], render):
+                i = job_ids[n]
+                finished.add(i)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    crashed[i] = e
+                    continue
+                except Exception as e:
+                    result = crash_result(jobs[i], e)
+                finish(i, result)
+        return [i for i in job_ids if i not in finished], crashed
+
+    def run(self, jobs, force=False):
+        """Export jobs; returns list of failed results (the archive is complete when empty)
+
+        Raises ValueError when two jobs of the same tenant have the same
+        output_name, since they would render to the same PDF and archive member.
+        After a worker crash, jobs that had not finished go on in a fresh
+        pool and the ones running at the time are retried one at a time.
+        """
+        seen = set()
+        for job in jobs:
+            name = (job.get('tenant'), job.get('output_name'))
+            if name in seen:
+                tenant = f" (tenant {name[0]})" if name[0] else ""
+                raise ValueError(f"Duplicate output_name in export jobs: {name[1]}{tenant}")
+            seen.add(name)
+
+        done, archived, checkpoint = self.load_journal()
+        if checkpoint is None:
+            done, archived = set(), set()
+            if self.journal_path.exists():
+                self.journal_path.unlink()
+        else:
+            print(f"↩️  Resuming export: {len(done)} reports already archived")
+
+        keys = []
+        todo = []
+        for job in jobs:
+            key = job_key(job)
+            if key not in done:
+                keys.append(key)
+                todo.append(dict(job, force=True) if force else job)
+        failed = []
+        archive = ExportArchive(self.partial_path, self.archive_path.suffix.lower() == '.zip', checkpoint)
+        try:
+            with open(self.journal_path, 'a', encoding='utf-8') as journal:
+                def finish(i, result):
+                    self.generator.tracer.replay(result.pop('trace', ()))
+                    if result['status'] != 'ok':
+                        print(f"  ❌ {result['output_name']} - {result['error']}")
+                        failed.append(result)
+                        return
+
+                    manifest = self.archive_result(archive, result, archived)
+                    if manifest is None:
+                        print(f"  ❌ {result['output_name']} - sources changed after rendering")
+                        failed.append(dict(result, status='error', error="Sources changed after rendering"))
+                        return
+                    journal.write(json.dumps({'job': keys[i], 'manifest': manifest,
+                                              'checkpoint': archive.checkpoint()}) + "\n")
+                    journal.flush()
+                    cached = ", cached" if result.get('cached') else ""
+                    print(f"  ✅ {manifest['report']} ({result['duration']:.2f}s{cached})")
+
+                # Same crash handling as ReportGenerator.generate_many
+                pending = list(range(len(todo)))
+                suspects = []
+                while pending or suspects:
+                    if suspects:
+                        i = suspects.pop()
+                        _, crashed = self.run_jobs(todo, [i], 1, finish)
+                        if crashed:
+                            # Crashed again on its own: this job kills the worker
+                            finish(i, crash_result(todo[i], crashed[i]))
+                    else:
+                        pending, crashed = self.run_jobs(todo, pending, self.workers, finish)
+                        suspects = list(crashed)
+
+            if failed:
+                # Keep partial archive and journal, so a later run only retries failures
+                return failed
+            self.write_manifest(archive)
+        finally:
+            archive.close()
+
+        os.replace(self.partial_path, self.archive_path)
+        self.journal_path.unlink()
+        return failed
+
+
+def run_export(generator, archive_path, jobs_file=None, workers=None, force=False):
+    """Export reports from a jobs file (or the generator's latest report) and print summary"""
+    if jobs_file:
+        with open(jobs_file, 'r', encoding='utf-8') as f:
+            jobs = json.load(f)
+    else:
+        jobs = [{
+            'output_name': "data_quality_report_latest.pdf",
+            'data_folder': str(generator.data_folder),
+            'template': str(generator.template_path),
+        }]
+
+    exporter = ReportExporter(generator, archive_path, workers)
+    print(f"\n📦 Export: {len(jobs)} reports → {exporter.archive_path}")
+    print("=" * 60)
+    failed = exporter.run(jobs, force=force)
+
+    if failed:
+        print(f"\n⚠️  {len(failed)} reports failed; run the same command again to retry them")
+        print(f"   Partial archive: {exporter.partial_path}")
+    else:
+        print(f"\n✅ Export complete: {exporter.archive_path}")
+    return failed
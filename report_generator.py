@@ -4,190 +4,320 @@ PDF Generator from HTML files - Reporting System
 Script for generating final PDF from filled HTML report
 """
 
+import io
 import json
 import os
 import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
 from datetime import datetime
+from functools import partial
+from importlib.util import find_spec
 from pathlib import Path
 
-# Check available PDF libraries
-PDF_LIBRARY = None
-PDF_METHOD = None
+from cli_args import parse_args
+from file_lock import folder_lock, output_lock
+from render_cache import RenderCache, file_sha256
+from section_index import SectionIndex, SectionResolver, KIND_FULL, KIND_INVALID, KIND_SECTION, record_summary
+from section_schema import RENDERED_KEY, SchemaError, is_section_payload, render_section, validate, without_rendered
+from template_engine import load_template
+from scheduler import FairScheduler
+from tracing import ChromeTraceHook, EventBuffer, JSONLinesHook, StageSummaryHook, Tracer
+from workspace import Workspace
 
-try:
-    from weasyprint import HTML, CSS
-    PDF_LIBRARY = 'weasyprint'
-    PDF_METHOD = 'weasyprint'
-except ImportError:
-    pass
+DEFAULT_REPORT_FOLDER = "c:/repos/report"
 
-if PDF_LIBRARY is None:
-    try:
-        import pdfkit
-        PDF_LIBRARY = 'pdfkit'
-        PDF_METHOD = 'pdfkit'
-    except ImportError:
-        pass
+# Most pdfkit batch jobs rendered by one wkhtmltopdf process
+PDFKIT_BATCH_SIZE = 16
 
-if PDF_LIBRARY is None:
-    try:
-        from playwright.sync_api import sync_playwright
-        PDF_LIBRARY = 'playwright'
-        PDF_METHOD = 'playwright'
-    except ImportError:
-        pass
+# Section files at least this large have their field values streamed when writing HTML
+STREAM_MIN_FILE_BYTES = 8 * 1024 * 1024
+
+# PDF libraries in priority order (backend name -> module to probe)
+PDF_BACKENDS = {
+    'weasyprint': 'weasyprint',
+    'pdfkit': 'pdfkit',
+    'playwright': 'playwright',
+}
+
+PDF_LABELS = {
+    'weasyprint': 'WeasyPrint',
+    'pdfkit': 'pdfkit',
+    'playwright': 'Playwright',
+}
+
+
+def available_backends():
+    """Return installed PDF backends without importing them"""
+    return [name for name, module in PDF_BACKENDS.items() if find_spec(module) is not None]
+
+
+def detect_pdf_method():
+    """Pick the first installed backend, or 'browser' if there is none"""
+    backends = available_backends()
+    if backends:
+        return backends[0]
+    print("ℹ️  No PDF libraries found. Use browser method (Ctrl+P -> Save as PDF)", file=sys.stderr)
+    return 'browser'
 
-# If no libraries available, use browser
-if PDF_LIBRARY is None:
-    PDF_METHOD = 'browser'
-    print("ℹ️  No PDF libraries found. Use browser method (Ctrl+P -> Save as PDF)")
+
+# Check available PDF libraries (backends are imported only when rendering)
+PDF_METHOD = detect_pdf_method()
+PDF_LIBRARY = None if PDF_METHOD == 'browser' else PDF_METHOD
+
+
+# Styles for PDF
+PDF_CSS = """
+@media print {
+    .controls, .section-actions, .btn {
+        display: none !important;
+    }
+    body {
+        background-color: white;
+        padding: 0;
+    }
+    .container {
+        box-shadow: none;
+        max-width: 100%;
+    }
+    .field-input {
+        display: none !important;
+    }
+    .field-value {
+        display: block !important;
+    }
+}
+"""
+
+
+def collect_sections(payloads):
+    """Merge single-section and full-report payloads into {section_id: data}
+    
+    Raises SchemaError (a ValueError) for payloads not matching the section schema.
+    Render-ready values in payloads are dropped, so only the raw values are
+    used (and escaped when rendering).
+    """
+    all_data = {}
+    for data in payloads:
+        validate(data)
+        if not is_section_payload(data):
+            raise SchemaError("$: missing 'sectionId'")
+        if 'sections' in data:
+            for section_id, section in data['sections'].items():
+                all_data[section_id] = without_rendered(section)
+        else:
+            all_data[data['sectionId']] = without_rendered(data)
+    return all_data
 
 
 class ReportGenerator:
-    def __init__(self, report_folder="c:/repos/report"):
+    def __init__(self, report_folder=DEFAULT_REPORT_FOLDER, data_folder=None, output_folder=None,
+                 backend=None, tracer=None, template_path=None):
+        self.pdf_method = backend or PDF_METHOD
+        self.tracer = tracer or Tracer()
         self.report_folder = Path(report_folder)
-        self.data_folder = self.report_folder / "saved_sections"
-        self.output_folder = self.report_folder / "generated_pdfs"
+        self.data_folder = Path(data_folder) if data_folder else self.report_folder / "saved_sections"
+        self.output_folder = Path(output_folder) if output_folder else self.report_folder / "generated_pdfs"
+        self.template_path = Path(template_path) if template_path else self.report_folder / "report_template.html"
         
         # Create folders if they don't exist
         self.data_folder.mkdir(exist_ok=True)
         self.output_folder.mkdir(exist_ok=True)
+        
+        self.index = SectionIndex(self.data_folder)
+        self.cache = RenderCache(self.output_folder / ".cache")
+    
+    def find_section_record(self, section_id):
+        """Find index record of the section revision to use (newest file containing it)"""
+        return self.index.latest(section_id)
     
-    def load_section_data(self, section_id):
+    def load_section_data(self, section_id, refresh=True):
         """Load section data from JSON file"""
-        # Try to find single section files
-        json_files = list(self.data_folder.glob(f"{section_id}_*.json"))
-        
-        # Also try to find full report files
-        full_report_files = list(self.data_folder.glob("data_quality_report_full_*.json"))
+        if refresh:
+            self.index.refresh()
         
-        if not json_files and not full_report_files:
+        resolver = SectionResolver(self.index, refresh=False)
+        record = resolver.checked_record(section_id, self.find_section_record(section_id))
+        return self.load_record(resolver, section_id, record)
+    
+    def load_record(self, resolver, section_id, record, lazy=False):
+        """Load section data from the file an index record points to"""
+        if record is None:
             print(f"⚠️  No data found for section: {section_id}")
             return None
         
-        # First try single section files
-        if json_files:
-            latest_file = max(json_files, key=lambda p: p.stat().st_mtime)
-            
-            with open(latest_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            print(f"✅ Loaded section data: {section_id} from {latest_file.name}")
-            return data
+        if lazy:
+            data = resolver.lazy_section_data(section_id, record)
+        else:
+            data = resolver.section_data(section_id, record)
         
-        # If no single section file, try to extract from full report
-        if full_report_files:
-            latest_file = max(full_report_files, key=lambda p: p.stat().st_mtime)
-            
-            with open(latest_file, 'r', encoding='utf-8') as f:
-                full_data = json.load(f)
-            
-            # Check if it has sections key
-            if 'sections' in full_data and section_id in full_data['sections']:
-                print(f"✅ Loaded section data: {section_id} from full report {latest_file.name}")
-                return full_data['sections'][section_id]
+        if record['kind'] == KIND_SECTION:
+            print(f"✅ Loaded section data: {section_id} from {record['name']}")
+        else:
+            print(f"✅ Loaded section data: {section_id} from full report {record['name']}")
+        return data
+    
+    def load_section_files(self, json_paths):
+        """Load section data from explicit JSON files (single sections or full reports)"""
+        payloads = []
+        for json_path in json_paths:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                payloads.append(json.load(f))
+        
+        return collect_sections(payloads)
+    
+    def load_sections(self, section_ids, stream_min_bytes=None):
+        """Load newest data of each section from saved_sections into {section_id: data}
         
-        print(f"⚠️  No data found for section: {section_id}")
-        return None
+        Sections from files of at least stream_min_bytes get LazyJSONString
+        field values, read from the file only while the HTML is written.
+        Smaller files are parsed once, as a whole, and validated: a file that
+        fails is quarantined and the section's previous revision is used.
+        """
+        with self.tracer.stage('discover') as span:
+            resolver = SectionResolver(self.index)
+            records = resolver.records(section_ids)
+            span['sections'] = sum(1 for record in records.values() if record)
+        
+        with self.tracer.stage('load') as span:
+            all_data = {}
+            for section_id, record in records.items():
+                lazy = stream_min_bytes is not None and record is not None and record['size'] >= stream_min_bytes
+                if not lazy:
+                    record = records[section_id] = resolver.checked_record(section_id, record)
+                data = self.load_record(resolver, section_id, record, lazy)
+                if data:
+                    all_data[section_id] = data
+            # Each source file is parsed once even if it holds several sections
+            sources = {record['name']: record['size'] for record in records.values() if record}
+            span['files'] = len(sources)
+            span['bytes'] = sum(sources.values())
+        return all_data
     
-    def inject_data_into_html(self, html_path):
+    def inject_data_into_html(self, html_path, all_data=None):
         """Load HTML and inject data from JSON"""
-        with open(html_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        # Sections to load
-        sections = [
-            'overall-assessment',
-            'completeness-analysis',
-            'accuracy-consistency',
-            'action-plan'
-        ]
+        template = load_template(html_path)
         
         # Load all sections
-        all_data = {}
-        for section_id in sections:
-            data = self.load_section_data(section_id)
-            if data:
-                all_data[section_id] = data
+        if all_data is None:
+            all_data = self.load_sections(template.registry.section_ids)
+        
+        with self.tracer.stage('inject') as span:
+            html_content = template.render(self.build_slot_values(all_data, template.registry))
+            span['bytes'] = len(html_content)
+        return html_content
+    
+    def write_html(self, html_path, target, all_data=None):
+        """Stream filled HTML to a file path or writable object
         
-        # Inject data into HTML (replace placeholders with actual values)
+        Sections from large files are loaded lazily, so their field values
+        go from the JSON files to the target in chunks and memory does not
+        grow with field size.
+        """
+        template = load_template(html_path)
+        if all_data is None:
+            all_data = self.load_sections(template.registry.section_ids, STREAM_MIN_FILE_BYTES)
+        
+        values = self.build_slot_values(all_data, template.registry)
+        with self.tracer.stage('inject', streaming=True) as span:
+            if hasattr(target, 'write'):
+                written = template.render_to(target, values)
+            else:
+                with open(target, 'w', encoding='utf-8') as f:
+                    written = template.render_to(f, values)
+            span['bytes'] = written
+        return target
+    
+    def source_hashes(self, html_path, section_files=None):
+        """Content hashes of the section revisions a render of html_path would use"""
+        if section_files:
+            return {str(path): file_sha256(path) for path in section_files}
+        
+        with self.tracer.stage('discover'):
+            self.index.refresh()
+            hashes = {}
+            section_ids = load_template(html_path).registry.section_ids
+            for section_id, record in self.index.latest_many(section_ids).items():
+                if record is not None:
+                    hashes[section_id] = record['sha256']
+        return hashes
+    
+    def render_cache_key(self, html_path, section_files=None, split=False):
+        """Cache key for rendering html_path with the current section revisions"""
+        backend = f"{self.pdf_method}+split" if split else self.pdf_method
+        return RenderCache.make_key(
+            load_template(html_path).digest, backend, PDF_CSS, self.source_hashes(html_path, section_files)
+        )
+    
+    def build_slot_values(self, all_data, registry):
+        """Map loaded section data to template slot values
+        
+        Uses the escaped values stored at ingest (checked by the schema when
+        the file is loaded); other sections (older or large files, explicit
+        section files, server payloads) are escaped here.
+        """
+        values = {}
         for section_id, data in all_data.items():
-            for field_id, field_value in data.get('fields', {}).items():
-                # Replace content in view
-                placeholder = f'id="{field_id}-view">[Enter'
-                if placeholder in html_content:
-                    # Find and replace
-                    import re
-                    pattern = f'(<div[^>]*id="{field_id}-view"[^>]*>).*?(</div>)'
-                    replacement = f'\\1{field_value}\\2'
-                    html_content = re.sub(pattern, replacement, html_content, flags=re.DOTALL)
+            rendered = data.get(RENDERED_KEY) or render_section(data)
+            for field_id, field_value in rendered['fields'].items():
+                values[f'{field_id}-view'] = field_value
             
             # Update author and date metadata
-            if 'author' in data and 'timestamp' in data:
-                author = data['author']
-                date = datetime.fromisoformat(data['timestamp']).strftime('%Y-%m-%d %H:%M')
-                
-                prefix = self.get_section_prefix(section_id)
-                html_content = html_content.replace(
-                    f'<span id="{prefix}-author">Not saved</span>',
-                    f'<span id="{prefix}-author">{author}</span>'
-                )
-                html_content = html_content.replace(
-                    f'<span id="{prefix}-date">-</span>',
-                    f'<span id="{prefix}-date">{date}</span>'
-                )
+            if 'author' in rendered and 'date' in rendered:
+                prefix = registry.prefix(section_id)
+                values[f'{prefix}-author'] = rendered['author']
+                values[f'{prefix}-date'] = rendered['date']
         
-        return html_content
+        return values
     
-    def get_section_prefix(self, section_id):
-        """Get section prefix"""
-        prefixes = {
-            'overall-assessment': 'overall',
-            'completeness-analysis': 'compl',
-            'accuracy-consistency': 'acc',
-            'action-plan': 'action'
-        }
-        return prefixes.get(section_id, section_id)
-    
-    def generate_pdf_weasyprint(self, html_content, output_path, pdf_css):
-        """Generate PDF using WeasyPrint"""
-        from weasyprint import HTML as WeasyprintHTML, CSS as WeasyprintCSS
-        WeasyprintHTML(string=html_content, base_url=str(self.report_folder)).write_pdf(
-            output_path,
-            stylesheets=[WeasyprintCSS(string=pdf_css)]
+    def generate_pdf_weasyprint(self, html_content, output_path, pdf_css, html_file=None):
+        """Generate PDF using WeasyPrint (stylesheet, fonts and assets reused across renders)"""
+        from pdf_resources import get_weasyprint_resources
+        get_weasyprint_resources().render(
+            output_path, pdf_css, html_content, html_file, base_url=str(self.report_folder)
         )
     
-    def generate_pdf_pdfkit(self, html_content, output_path):
+    def generate_pdf_pdfkit(self, html_content, output_path, html_file=None):
         """Generate PDF using pdfkit (requires wkhtmltopdf)"""
         import pdfkit
-        pdfkit.from_string(html_content, str(output_path))
+        if html_file is not None:
+            pdfkit.from_file(str(html_file), str(output_path))
+        else:
+            pdfkit.from_string(html_content, str(output_path))
     
-    def generate_pdf_playwright(self, html_content, output_path):
-        """Generate PDF using Playwright"""
-        from playwright.sync_api import sync_playwright
-        
-        # Save temporary HTML file
-        temp_html = self.report_folder / "temp_report.html"
-        with open(temp_html, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            page = browser.new_page()
-            page.goto(f"file:///{temp_html}")
-            page.pdf(path=str(output_path), format='A4')
-            browser.close()
-        
-        # Remove temporary file
-        temp_html.unlink()
+    def generate_pdf_playwright(self, html_content, output_path, html_file=None):
+        """Generate PDF using Playwright (shared long-lived browser)"""
+        from browser_pool import get_browser_pool
+        
+        # Pages are loaded with set_content, which takes the whole HTML at once
+        if html_file is not None:
+            html_content = Path(html_file).read_text(encoding='utf-8')
+        get_browser_pool().render(html_content, output_path, base_folder=self.report_folder)
+    
+    def scratch_path(self, suffix):
+        """Unique scratch file next to the template (so relative assets resolve the same way)"""
+        return self.report_folder / f".report_filled_{uuid.uuid4().hex}{suffix}"
     
-    def generate_pdf_browser(self, html_content, output_path):
+    def generate_pdf_browser(self, html_path, output_path, all_data=None):
         """Prepare HTML for manual printing through browser"""
-        # Save filled HTML
-        filled_html = self.report_folder / "report_filled.html"
-        with open(filled_html, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
+        # Save filled HTML next to the PDF name, so concurrent jobs never share it
+        filled_html = output_path.with_suffix('.html')
+        scratch = self.scratch_path('.html')
+        try:
+            with self.tracer.stage('write', target='html'):
+                with folder_lock(self.data_folder, shared=True):
+                    self.write_html(html_path, scratch, all_data)
+                os.replace(scratch, filled_html)
+        finally:
+            if scratch.exists():
+                scratch.unlink()
+        return self.open_in_browser(filled_html, output_path)
+    
+    def open_in_browser(self, filled_html, output_path):
+        """Print manual PDF instructions and open filled HTML in the browser"""
         print(f"\n📄 Filled report saved: {filled_html}")
         print("\n📋 PDF Generation Instructions:")
         print("1. Open file in browser:")
@@ -206,122 +336,243 @@ class ReportGenerator:
         
         return filled_html
     
-    def generate_pdf(self, html_path=None, output_name=None):
-        """Generate PDF from HTML"""
+    def render_pdf(self, html_content, output_path, html_file=None):
+        """Render PDF with the available library (raises on failure)
+        
+        Pass html_content=None and html_file to render an HTML file written
+        with write_html instead of an in-memory string.
+        """
+        with self.tracer.stage('render', backend=self.pdf_method) as span:
+            if self.pdf_method == 'weasyprint':
+                self.generate_pdf_weasyprint(html_content, output_path, PDF_CSS, html_file)
+            elif self.pdf_method == 'pdfkit':
+                self.generate_pdf_pdfkit(html_content, output_path, html_file)
+            elif self.pdf_method == 'playwright':
+                self.generate_pdf_playwright(html_content, output_path, html_file)
+            else:
+                raise RuntimeError("No PDF library available")
+            if self.tracer.enabled:
+                span['bytes'] = os.path.getsize(output_path)
+        return output_path
+    
+    def render_pdf_split(self, html_content, output_path, section_ids, workers=None):
+        """Render each section as its own PDF in parallel and stitch them (needs pypdf)"""
+        from split_render import SplitRenderer
+        with self.tracer.stage('render', backend=self.pdf_method, split=True) as span:
+            span['reused'] = SplitRenderer(self, PDF_CSS, workers).render(html_content, output_path, section_ids)
+        return output_path
+    
+    def generate_pdf(self, html_path=None, output_name=None, section_files=None, force=False, split=False):
+        """Generate PDF from HTML
+        
+        With split=True sections are rendered in parallel worker processes
+        and concatenated; unchanged sections reuse earlier fragments.
+        """
+        with self.tracer.stage('generate', backend=self.pdf_method) as span:
+            result = self._generate_pdf(html_path, output_name, section_files, force, split)
+            span['output'] = str(result) if result else None
+        return result
+    
+    def _generate_pdf(self, html_path, output_name, section_files, force, split):
         if html_path is None:
-            html_path = self.report_folder / "report_template.html"
+            html_path = self.template_path
         
         if not os.path.exists(html_path):
             print(f"❌ HTML file does not exist: {html_path}")
             return None
         
         print(f"\n📄 Generating PDF from: {html_path}")
-        print(f"🔧 Method: {PDF_METHOD}")
+        print(f"🔧 Method: {self.pdf_method}")
         print("=" * 60)
         
-        # Load and inject data
-        html_content = self.inject_data_into_html(html_path)
-        
-        # Add styles for PDF
-        pdf_css = """
-        @media print {
-            .controls, .section-actions, .btn {
-                display: none !important;
-            }
-            body {
-                background-color: white;
-                padding: 0;
-            }
-            .container {
-                box-shadow: none;
-                max-width: 100%;
-            }
-            .field-input {
-                display: none !important;
-            }
-            .field-value {
-                display: block !important;
-            }
-        }
-        """
-        
-        # Generate PDF
         if output_name is None:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             output_name = f"data_quality_report_{timestamp}.pdf"
         
         output_path = self.output_folder / output_name
         
+        # Reuse previous PDF when nothing affecting the output has changed
+        cache_key = None
+        if self.pdf_method != 'browser':
+            cache_key = self.render_cache_key(html_path, section_files, split)
+            if not force and self.cache.fetch(cache_key, output_path):
+                print(f"\n♻️  Sections unchanged - reused cached PDF")
+                print(f"📁 Location: {output_path}")
+                return output_path
+        
+        # Load data
+        all_data = None
+        if section_files:
+            with self.tracer.stage('load', files=len(section_files)):
+                all_data = self.load_section_files(section_files)
+        
+        if self.pdf_method == 'browser':
+            return self.generate_pdf_browser(html_path, output_path, all_data)
+        
+        # Filled HTML is streamed to a scratch file WeasyPrint or pdfkit reads from
+        filled_html = self.scratch_path('.html')
         try:
-            if PDF_METHOD == 'weasyprint':
-                self.generate_pdf_weasyprint(html_content, output_path, pdf_css)
-                print(f"\n✅ PDF generated successfully (WeasyPrint)!")
-            elif PDF_METHOD == 'pdfkit':
-                self.generate_pdf_pdfkit(html_content, output_path)
-                print(f"\n✅ PDF generated successfully (pdfkit)!")
-            elif PDF_METHOD == 'playwright':
-                self.generate_pdf_playwright(html_content, output_path)
-                print(f"\n✅ PDF generated successfully (Playwright)!")
-            else:  # browser
-                return self.generate_pdf_browser(html_content, output_path)
-            
+            with output_lock(output_path):
+                self.cache.release(output_path)
+                if split:
+                    with folder_lock(self.data_folder, shared=True):
+                        html_content = self.inject_data_into_html(html_path, all_data)
+                    self.render_pdf_split(html_content, output_path, load_template(html_path).registry.section_ids)
+                elif self.pdf_method == 'playwright':
+                    with folder_lock(self.data_folder, shared=True):
+                        html_content = self.inject_data_into_html(html_path, all_data)
+                    self.render_pdf(html_content, output_path)
+                else:
+                    with folder_lock(self.data_folder, shared=True):
+                        self.write_html(html_path, filled_html, all_data)
+                    self.render_pdf(None, output_path, html_file=filled_html)
+                with self.tracer.stage('write', target='cache'):
+                    self.cache.store(cache_key, output_path)
+            print(f"\n✅ PDF generated successfully ({PDF_LABELS[self.pdf_method]})!")
             print(f"📁 Location: {output_path}")
             return output_path
             
         except Exception as e:
             print(f"\n❌ Error generating PDF: {e}")
             print("\n💡 Alternative - use browser method:")
-            return self.generate_pdf_browser(html_content, output_path)
+            return self.generate_pdf_browser(html_path, output_path, all_data)
+        finally:
+            if filled_html.exists():
+                filled_html.unlink()
+    
+    def generate_many(self, jobs, workers=None):
+        """Generate many PDFs in parallel worker processes
+        
+        Each job is a dict with 'output_name' and either 'data_folder'
+        (a saved_sections-style folder) or 'sections' (list of JSON files).
+        Set 'force' to bypass the render cache and 'backend' to override
+        the generator's PDF backend. Jobs with a 'tenant' read and write
+        that tenant's workspace unless folders are given, and jobs of
+        different tenants are interleaved fairly.
+        Returns one result dict per job, in job order.
+        
+        pdfkit jobs of a tenant are rendered in groups of up to
+        PDFKIT_BATCH_SIZE by one wkhtmltopdf process per group.
+        
+        When a worker process dies (e.g. out of memory or a crash in a PDF
+        library) the pool breaks. Jobs that had not finished go on in a
+        fresh pool; the ones running at the time of the crash are retried
+        one at a time, so only the job that crashes again is reported failed.
+        
+        Stages timed in the workers are passed to this generator's tracer.
+        """
+        results = [None] * len(jobs)
+        workers = workers or os.cpu_count() or 1
+        groups = self.batch_groups(jobs, workers)
+        
+        pending = list(range(len(groups)))
+        suspects = []
+        while pending or suspects:
+            if suspects:
+                g = suspects.pop()
+                _, crashed = self.run_groups(jobs, groups, [g], 1, results)
+                if crashed:
+                    # Crashed again on its own: this job kills the worker
+                    fail_jobs(jobs, groups[g], crashed[g], results)
+            else:
+                pending, crashed = self.run_groups(jobs, groups, pending, workers, results)
+                suspects = list(crashed)
+        
+        return results
+    
+    def run_groups(self, jobs, groups, group_ids, workers, results):
+        """Run job groups in a new process pool, filling results
+        
+        Returns (group ids never started, {group id: error} for groups
+        whose worker died) after a worker crash; both are empty otherwise.
+        """
+        render = partial(run_batch_group, str(self.report_folder), str(self.output_folder),
+                         backend=self.pdf_method, trace=self.tracer.enabled)
+        finished = set()
+        crashed = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            units = [[jobs[i] for i in groups[g]] for g in group_ids]
+            scheduled = FairScheduler(pool, workers).run(units, render, tenant_of=lambda unit: unit[0].get('tenant'))
+            for u, future in scheduled:
+                g = group_ids[u]
+                finished.add(g)
+                try:
+                    for i, result in zip(groups[g], future.result()):
+                        self.tracer.replay(result.pop('trace', ()))
+                        results[i] = result
+                except BrokenProcessPool as e:
+                    crashed[g] = e
+                except Exception as e:
+                    fail_jobs(jobs, groups[g], e, results)
+        return [g for g in group_ids if g not in finished], crashed
+    
+    def batch_groups(self, jobs, workers):
+        """Split job indices into units of work: pdfkit jobs of one tenant are grouped, others run alone"""
+        groups = []
+        pdfkit_jobs = {}
+        for i, job in enumerate(jobs):
+            if job.get('backend', self.pdf_method) == 'pdfkit':
+                pdfkit_jobs.setdefault(job.get('tenant'), []).append(i)
+            else:
+                groups.append([i])
+        for indices in pdfkit_jobs.values():
+            # Small enough groups that every worker gets one
+            size = max(1, min(PDFKIT_BATCH_SIZE, -(-len(indices) // workers)))
+            groups.extend(indices[n:n + size] for n in range(0, len(indices), size))
+        return groups
     
-    def list_saved_sections(self):
+    def list_saved_sections(self, limit=None, offset=0, as_json=False):
         """Display list of saved sections"""
+        self.index.refresh()
+        records = self.index.files(limit=limit, offset=offset)
+        
+        if as_json:
+            print(json.dumps([record_summary(record) for record in records], indent=2))
+            return records
+        
         print("\n📋 Saved Sections:")
         print("=" * 60)
         
-        json_files = list(self.data_folder.glob("*.json"))
-        
-        if not json_files:
+        if not records:
             print("⚠️  No saved sections found")
-            return
+            return records
         
-        # Separate full reports from individual sections
+        # Separate full reports from individual sections (records are newest first)
         full_reports = []
         individual_sections = {}
+        invalid_files = []
         
-        for json_file in json_files:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        for record in records:
+            modified = datetime.fromtimestamp(record['mtime_ns'] / 1e9)
+            
+            # Files failing the schema are never used by generate
+            if record['kind'] == KIND_INVALID:
+                invalid_files.append({'file': record['name'], 'modified': modified})
+            
+            # Check if it's a full report
+            elif record['kind'] == KIND_FULL:
+                full_reports.append({
+                    'file': record['name'],
+                    'author': record['author'] or 'Unknown',
+                    'modified': modified,
+                    'section_count': len(record['section_ids'])
+                })
+            else:
+                # Individual section
+                section_id = record['section_ids'][0] if record['section_ids'] else 'unknown'
                 
-                # Check if it's a full report
-                if 'sections' in data:
-                    full_reports.append({
-                        'file': json_file.name,
-                        'author': data.get('author', 'Unknown'),
-                        'savedAt': data.get('savedAt', ''),
-                        'modified': datetime.fromtimestamp(json_file.stat().st_mtime),
-                        'section_count': len(data.get('sections', {}))
-                    })
-                else:
-                    # Individual section
-                    section_id = data.get('sectionId', 'unknown')
-                    
-                    if section_id not in individual_sections:
-                        individual_sections[section_id] = []
-                    
-                    individual_sections[section_id].append({
-                        'file': json_file.name,
-                        'author': data.get('author', 'Unknown'),
-                        'timestamp': data.get('timestamp', ''),
-                        'modified': datetime.fromtimestamp(json_file.stat().st_mtime)
-                    })
+                individual_sections.setdefault(section_id, []).append({
+                    'file': record['name'],
+                    'author': record['author'] or 'Unknown',
+                    'modified': modified
+                })
         
         # Display full reports first
         if full_reports:
             print("\n📦 Full Reports:")
-            full_reports.sort(key=lambda x: x['modified'], reverse=True)
             for i, report in enumerate(full_reports):
                 prefix = "  └─" if i == len(full_reports) - 1 else "  ├─"
-                newest = " [LATEST]" if i == 0 else ""
+                newest = " [LATEST]" if i == 0 and offset == 0 else ""
                 print(f"{prefix} {report['file']}{newest}")
                 print(f"     Author: {report['author']}")
                 print(f"     Sections: {report['section_count']}")
@@ -332,37 +583,338 @@ class ReportGenerator:
             print("\n📄 Individual Sections:")
             for section_id, files in individual_sections.items():
                 print(f"\n📌 {section_id}:")
-                files.sort(key=lambda x: x['modified'], reverse=True)
                 
                 for i, file_data in enumerate(files):
                     prefix = "  └─" if i == len(files) - 1 else "  ├─"
-                    newest = " [LATEST]" if i == 0 else ""
+                    newest = " [LATEST]" if i == 0 and offset == 0 else ""
                     print(f"{prefix} {file_data['file']}{newest}")
                     print(f"     Author: {file_data['author']}")
                     print(f"     Date: {file_data['modified'].strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        # Display invalid files last
+        if invalid_files:
+            print("\n⚠️  Invalid Files (not used by generate):")
+            for i, file_data in enumerate(invalid_files):
+                prefix = "  └─" if i == len(invalid_files) - 1 else "  ├─"
+                print(f"{prefix} {file_data['file']} ⚠️ invalid")
+                print(f"     Date: {file_data['modified'].strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        shown = offset + len(records)
+        total = self.index.count()
+        if limit is not None and shown < total:
+            print(f"\n… showing {offset + 1}-{shown} of {total} files (use --offset {shown} for more)")
+        
+        return records
+
+
+def fail_jobs(jobs, indices, error, results):
+    """Record an error result for jobs whose worker did not return one"""
+    for i in indices:
+        results[i] = {
+            'output_name': jobs[i].get('output_name'),
+            'status': 'error',
+            'error': f"{type(error).__name__}: {error}",
+        }
+
+
+def prepare_batch_job(report_folder, output_folder, job, backend=None, tracer=None):
+    """Validate a batch job; returns (generator, template path, output path)"""
+    if not job.get('output_name'):
+        raise ValueError("Job has no 'output_name'")
+    if job.get('data_folder') and job.get('sections'):
+        raise ValueError("Job needs only one of 'data_folder' or 'sections'")
+    
+    report_folder = job.get('report_folder', report_folder)
+    data_folder = job.get('data_folder')
+    template_path = None
+    if job.get('tenant'):
+        workspace = Workspace(report_folder, job['tenant'])
+        data_folder = data_folder or workspace.data_folder
+        output_folder = workspace.output_folder
+        template_path = workspace.template_path
+    elif not data_folder and not job.get('sections'):
+        raise ValueError("Job needs 'data_folder', 'sections' or 'tenant'")
+    if job.get('data_folder') and not Path(job['data_folder']).is_dir():
+        raise ValueError(f"Job data_folder does not exist: {job['data_folder']}")
+    
+    generator = ReportGenerator(
+        report_folder,
+        data_folder=data_folder,
+        output_folder=output_folder,
+        backend=job.get('backend', backend),
+        tracer=tracer,
+        template_path=template_path
+    )
+    html_path = job.get('template', generator.template_path)
+    output_path = generator.output_folder / job['output_name']
+    return generator, html_path, output_path
+
+
+def worker_tracer(trace):
+    """Tracer for a worker process: records stages in an EventBuffer when trace is set"""
+    return Tracer([EventBuffer()]) if trace else Tracer()
+
+
+def run_batch_job(report_folder, output_folder, job, backend=None, tracer=None):
+    """Render one batch job (runs inside a worker process)"""
+    started = time.perf_counter()
+    result = {'output_name': job.get('output_name'), 'status': 'ok'}
+    log = io.StringIO()
+    
+    try:
+        with redirect_stdout(log):
+            generator, html_path, output_path = prepare_batch_job(report_folder, output_folder, job, backend, tracer)
+            cache_key = generator.render_cache_key(html_path, job.get('sections'))
+            if not job.get('force') and generator.cache.fetch(cache_key, output_path):
+                result['cached'] = True
+            else:
+                all_data = generator.load_section_files(job['sections']) if job.get('sections') else None
+                with output_lock(output_path):
+                    with folder_lock(generator.data_folder, shared=True):
+                        html_content = generator.inject_data_into_html(html_path, all_data)
+                    generator.cache.release(output_path)
+                    generator.render_pdf(html_content, output_path)
+                    generator.cache.store(cache_key, output_path)
+            result['output'] = str(output_path)
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    
+    result['duration'] = time.perf_counter() - started
+    result['log'] = log.getvalue()
+    return result
+
+
+def run_pdfkit_batch(report_folder, output_folder, jobs, tracer=None):
+    """Render several pdfkit batch jobs with one wkhtmltopdf process (runs inside a worker process)
+    
+    Filled HTML of every job that is not cached is written to a scratch
+    file first; all of them are then rendered by a single wkhtmltopdf run
+    (one more run for each further job sharing an output name).
+    """
+    tracer = tracer or Tracer()
+    results = []
+    pending = []  # (result, log, started, generator, scratch, output path, cache key)
+    for job in jobs:
+        started = time.perf_counter()
+        result = {'output_name': job.get('output_name'), 'status': 'ok'}
+        log = io.StringIO()
+        results.append(result)
+        try:
+            with redirect_stdout(log):
+                generator, html_path, output_path = prepare_batch_job(report_folder, output_folder, job, 'pdfkit', tracer)
+                cache_key = generator.render_cache_key(html_path, job.get('sections'))
+                if not job.get('force') and generator.cache.fetch(cache_key, output_path):
+                    result['cached'] = True
+                    result['output'] = str(output_path)
+                else:
+                    all_data = generator.load_section_files(job['sections']) if job.get('sections') else None
+                    scratch = generator.scratch_path('.html')
+                    with folder_lock(generator.data_folder, shared=True):
+                        generator.write_html(html_path, scratch, all_data)
+                    pending.append((result, log, started, generator, scratch, output_path, cache_key))
+                    continue
+        except Exception as e:
+            result['status'] = 'error'
+            result['error'] = f"{type(e).__name__}: {e}"
+        result['duration'] = time.perf_counter() - started
+        result['log'] = log.getvalue()
+    
+    # Jobs sharing an output render in later wkhtmltopdf runs, one after another
+    rounds = []
+    seen = {}
+    for entry in pending:
+        n = seen[str(entry[5])] = seen.get(str(entry[5]), -1) + 1
+        if n == len(rounds):
+            rounds.append([])
+        rounds[n].append(entry)
+    try:
+        for entries in rounds:
+            render_pdfkit_round(entries, tracer)
+    finally:
+        for result, log, started, _, scratch, _, _ in pending:
+            if scratch.exists():
+                scratch.unlink()
+            result['duration'] = time.perf_counter() - started
+            result['log'] = log.getvalue()
+    
+    return results
+
+
+def render_pdfkit_round(pending, tracer):
+    """Render pending pdfkit jobs with distinct outputs in one wkhtmltopdf run"""
+    from pdf_resources import WkhtmltopdfBatch
+    
+    # Lock outputs in path order so workers sharing an output cannot deadlock
+    pending = sorted(pending, key=lambda entry: str(entry[5]))
+    locks = []
+    try:
+        for *_, output_path, _ in pending:
+            locks.append(output_lock(output_path).acquire())
+        for _, _, _, generator, _, output_path, _ in pending:
+            generator.cache.release(output_path)
+        
+        with tracer.stage('render', backend='pdfkit', batch=len(pending)):
+            errors = WkhtmltopdfBatch().render([(scratch, output_path) for *_, scratch, output_path, _ in pending])
+        for result, log, started, generator, _, output_path, cache_key in pending:
+            error = errors.get(str(output_path))
+            if error:
+                result['status'] = 'error'
+                result['error'] = f"RuntimeError: {error}"
+            else:
+                generator.cache.store(cache_key, output_path)
+                result['output'] = str(output_path)
+    except Exception as e:
+        for result, *_ in pending:
+            if 'output' not in result:
+                result['status'] = 'error'
+                result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        for lock in locks:
+            lock.release()
+
+
+def run_batch_group(report_folder, output_folder, jobs, backend=None, trace=False):
+    """Render a unit from batch_groups (runs inside a worker process); returns results in order
+    
+    With trace set, the stages of the whole unit are returned under the
+    first result's 'trace' key.
+    """
+    tracer = worker_tracer(trace)
+    if len(jobs) > 1:
+        results = run_pdfkit_batch(report_folder, output_folder, jobs, tracer)
+    else:
+        results = [run_batch_job(report_folder, output_folder, jobs[0], backend, tracer)]
+    if trace:
+        results[0]['trace'] = tracer.hooks[0].events
+    return results
+
+
+def run_batch(generator, jobs_file, workers=None, force=False):
+    """Run batch jobs from JSON file and print summary"""
+    with open(jobs_file, 'r', encoding='utf-8') as f:
+        jobs = json.load(f)
+    
+    if force:
+        jobs = [dict(job, force=True) for job in jobs]
+    
+    print(f"\n📦 Batch: {len(jobs)} jobs, {workers or os.cpu_count()} workers")
+    print("=" * 60)
+    
+    results = generator.generate_many(jobs, workers=workers)
+    
+    failed = 0
+    for result in results:
+        if result['status'] == 'ok':
+            cached = ", cached" if result.get('cached') else ""
+            print(f"  ✅ {result['output_name']} ({result['duration']:.2f}s{cached})")
+        else:
+            failed += 1
+            print(f"  ❌ {result['output_name']} - {result['error']}")
+    
+    print(f"\n✅ Generated {len(results) - failed}/{len(results)} PDFs")
+    return results
+
+
+# Options that take a value (--name value or --name=value)
+VALUE_OPTIONS = {'backend', 'folder', 'tenant', 'limit', 'offset', 'trace', 'chrome-trace'}
 
 
 def main():
     """Main program function"""
-    print("=" * 60)
-    print("   PDF Report Generation System")
-    print("=" * 60)
+    args, options = parse_args(sys.argv[1:], VALUE_OPTIONS)
+    
+    if not options.get('json'):
+        print("=" * 60)
+        print("   PDF Report Generation System")
+        print("=" * 60)
+    
+    backend = options.get('backend')
+    if backend is not None and backend not in available_backends() + ['browser']:
+        print(f"❌ PDF backend not available: {backend}")
+        print(f"   Installed: {', '.join(available_backends() + ['browser'])}")
+        sys.exit(1)
+    
+    if options.get('split'):
+        from split_render import split_available
+        if not split_available():
+            print("❌ --split needs pypdf (pip install pypdf)")
+            sys.exit(1)
     
-    generator = ReportGenerator()
+    tracer = Tracer()
+    if 'trace' in options:
+        tracer.add_hook(JSONLinesHook(options['trace']))
+    if 'chrome-trace' in options:
+        tracer.add_hook(ChromeTraceHook(options['chrome-trace']))
+    summary = tracer.add_hook(StageSummaryHook()) if options.get('timings') else None
     
-    if len(sys.argv) > 1:
-        command = sys.argv[1]
+    folder = options.get('folder', DEFAULT_REPORT_FOLDER)
+    if 'tenant' in options:
+        try:
+            generator = Workspace(folder, options['tenant']).generator(backend, tracer)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    else:
+        generator = ReportGenerator(folder, backend=backend, tracer=tracer)
+    
+    try:
+        run_command(generator, args, options)
+    finally:
+        tracer.close()
+        if summary is not None:
+            summary.print_summary()
+
+
+def run_command(generator, args, options):
+    """Run CLI command (or interactive menu) with the configured generator"""
+    force = bool(options.get('force'))
+    as_json = bool(options.get('json'))
+    
+    if args:
+        command = args[0]
         
         if command == "list":
-            generator.list_saved_sections()
+            limit = int(options['limit']) if 'limit' in options else None
+            generator.list_saved_sections(limit, int(options.get('offset', 0)), as_json)
         elif command == "generate":
-            output_name = sys.argv[2] if len(sys.argv) > 2 else None
-            generator.generate_pdf(output_name=output_name)
+            output_name = args[1] if len(args) > 1 else None
+            generator.generate_pdf(output_name=output_name, force=force, split=bool(options.get('split')))
+        elif command == "batch" and len(args) > 1:
+            workers = int(args[2]) if len(args) > 2 else None
+            results = run_batch(generator, args[1], workers, force=force)
+            if any(result['status'] != 'ok' for result in results):
+                sys.exit(1)
+        elif command == "export" and len(args) > 1:
+            if generator.pdf_method not in PDF_BACKENDS:
+                print("❌ export needs a PDF library (weasyprint, pdfkit or playwright)")
+                sys.exit(1)
+            from report_export import run_export
+            jobs_file = args[2] if len(args) > 2 else None
+            workers = int(args[3]) if len(args) > 3 else None
+            try:
+                failed = run_export(generator, args[1], jobs_file, workers, force=force)
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            if failed:
+                sys.exit(1)
         else:
             print(f"❌ Unknown command: {command}")
             print("\nAvailable commands:")
-            print("  python report_generator.py list        - Display saved sections")
-            print("  python report_generator.py generate    - Generate PDF")
+            print("  python report_generator.py list [--limit N] [--offset N] [--json] - Display saved sections")
+            print("  python report_generator.py generate [name] [--force] [--split] - Generate PDF")
+            print("  python report_generator.py batch <jobs.json> [workers] [--force] - Generate many PDFs")
+            print("  python report_generator.py export <archive.zip|.tar> [jobs.json] [workers] [--force]")
+            print("                    - Archive rendered PDFs with their source JSON and a manifest")
+            print("\n  --force           Re-render even if a cached PDF matches the current sections")
+            print("  --split           Render sections in parallel and stitch them (needs pypdf)")
+            print("  --backend <name>  PDF backend: weasyprint, pdfkit, playwright or browser")
+            print("  --folder <path>   Report folder (default: c:/repos/report)")
+            print("  --tenant <name>   Use the tenant's workspace (<folder>/workspaces/<name>)")
+            print("  --timings         Print time spent per stage (discover, load, inject, render, write)")
+            print("  --trace <file>    Append per-stage timings as JSON lines")
+            print("  --chrome-trace <file>  Write per-stage timings as Chrome trace (chrome://tracing)")
     else:
         # Interactive mode
         print("\n1. Display saved sections")
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Report Server - Reporting System
+Local HTTP service rendering PDFs from section JSON with pre-warmed worker processes
+"""
+
+import importlib
+import json
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from cli_args import parse_args
+import report_generator
+from report_generator import (DEFAULT_REPORT_FOLDER, PDF_BACKENDS, ReportGenerator,
+                              available_backends, collect_sections)
+from template_engine import load_template
+
+MAX_PAYLOAD_BYTES = 50 * 1024 * 1024
+
+# Worker process state (set by _init_worker)
+_worker_generator = None
+_worker_template = None
+_worker_scratch = None
+
+
+def _init_worker(report_folder, backend, html_path):
+    """Warm up worker: compile template, import the PDF backend and start its long-lived state"""
+    global _worker_generator, _worker_template, _worker_scratch
+    _worker_generator = ReportGenerator(report_folder, backend=backend)
+    _worker_template = html_path
+    _worker_scratch = tempfile.mkdtemp(prefix='report_worker_')
+    load_template(html_path)
+    if backend in PDF_BACKENDS:
+        importlib.import_module(PDF_BACKENDS[backend])
+        _warm_backend(backend)
+
+
+def _warm_backend(backend):
+    """Start what the first render would otherwise start: browser, fonts and stylesheet, wkhtmltopdf lookup"""
+    if backend == 'playwright':
+        from browser_pool import get_browser_pool
+        get_browser_pool().start()
+    elif backend == 'weasyprint':
+        from pdf_resources import get_weasyprint_resources
+        get_weasyprint_resources().stylesheet(report_generator.PDF_CSS)
+    elif backend == 'pdfkit':
+        from pdf_resources import wkhtmltopdf_binary
+        wkhtmltopdf_binary()
+
+
+def _render_in_worker(payloads, output_format):
+    """Render payloads to PDF (or filled HTML) bytes inside a worker"""
+    all_data = collect_sections(payloads)
+    html_content = _worker_generator.inject_data_into_html(_worker_template, all_data)
+    if output_format == 'html':
+        return html_content.encode('utf-8')
+
+    output_path = Path(_worker_scratch) / f"render_{os.getpid()}_{time.monotonic_ns()}.pdf"
+    try:
+        _worker_generator.render_pdf(html_content, output_path)
+        return output_path.read_bytes()
+    finally:
+        if output_path.exists():
+            output_path.unlink()
+
+
+class Metrics:
+    """Thread-safe request counters and latency totals"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.rendered = 0
+        self.failed = 0
+        self.rejected = 0
+        self.pool_restarts = 0
+        self.in_flight = 0
+        self.render_seconds = 0.0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'uptime_s': time.time() - self.started,
+                'requests': self.requests,
+                'rendered': self.rendered,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'pool_restarts': self.pool_restarts,
+                'in_flight': self.in_flight,
+                'avg_render_ms': self.render_seconds / self.rendered * 1000 if self.rendered else None,
+            }
+
+
+class ReportServer(ThreadingHTTPServer):
+    """HTTP server holding the worker pool and request queue limit
+
+    When a worker process dies the pool is replaced by a new one, and
+    /health reports 'degraded' until the new workers are warmed up.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, report_folder=DEFAULT_REPORT_FOLDER, backend=None, workers=None,
+                 queue_size=32, html_path=None):
+        super().__init__(address, ReportRequestHandler)
+        self.backend = backend or report_generator.PDF_METHOD
+        self.workers = workers or os.cpu_count() or 1
+        html_path = str(html_path or Path(report_folder) / "report_template.html")
+        self.initargs = (str(report_folder), self.backend, html_path)
+        self.pool_lock = threading.Lock()
+        self.degraded = False
+        self.pool = self.new_pool()
+        # Running plus waiting renders; further requests are rejected with 503
+        self.slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self.queue_size = queue_size
+        self.metrics = Metrics()
+
+    def new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=self.initargs)
+
+    def warm_up(self, pool=None):
+        """Start all workers now instead of on the first requests"""
+        pool = pool or self.pool
+        futures = [pool.submit(os.getpid) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def render(self, payloads, output_format):
+        """Render in a worker; replaces the pool when a worker died (the request still fails)"""
+        pool = self.pool
+        try:
+            return pool.submit(_render_in_worker, payloads, output_format).result()
+        except BrokenProcessPool:
+            self.restart_pool(pool)
+            raise
+
+    def restart_pool(self, broken):
+        """Replace a broken pool (once, however many requests saw it break) and warm it up"""
+        with self.pool_lock:
+            if self.pool is not broken:
+                return
+            print("⚠️  Worker process died, restarting worker pool")
+            self.degraded = True
+            self.pool = self.new_pool()
+            with self.metrics.lock:
+                self.metrics.pool_restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        threading.Thread(target=self._warm_up_restarted, args=(self.pool,), daemon=True).start()
+
+    def _warm_up_restarted(self, pool):
+        try:
+            self.warm_up(pool)
+        except BrokenProcessPool:
+            return  # Still degraded; the next request replaces the pool again
+        if self.pool is pool:
+            self.degraded = False
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """Endpoints: POST /render, GET /health, GET /metrics"""
+
+    server_version = "ReportServer/1.0"
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            status = 'degraded' if self.server.degraded else 'ok'
+            self._send(503 if self.server.degraded else 200,
+                       {'status': status, 'backend': self.server.backend, 'workers': self.server.workers})
+        elif self.path == '/metrics':
+            metrics = self.server.metrics.snapshot()
+            metrics['queue_size'] = self.server.queue_size
+            self._send(200, metrics)
+        else:
+            self._send(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        path, _, query = self.path.partition('?')
+        if path != '/render':
+            self._send(404, {'error': 'Not found'})
+            return
+
+        server = self.server
+        with server.metrics.lock:
+            server.metrics.requests += 1
+
+        if self.headers.get('Content-Length') is None:
+            self._send(411, {'error': 'Content-Length required'})
+            return
+        try:
+            length = int(self.headers['Content-Length'])
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send(400, {'error': 'Invalid Content-Length'})
+            return
+        if length == 0:
+            self._send(400, {'error': 'Empty request body'})
+            return
+        if length > MAX_PAYLOAD_BYTES:
+            self._send(413, {'error': f"Request body larger than {MAX_PAYLOAD_BYTES} bytes"})
+            return
+
+        try:
+            payload = json.loads(self.rfile.read(length))
+            payloads = payload if isinstance(payload, list) else [payload]
+            collect_sections(payloads)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self._send(400, {'error': f"Invalid section payload: {e}"})
+            return
+
+        output_format = 'html' if 'format=html' in query.split('&') else 'pdf'
+        if output_format == 'pdf' and server.backend not in PDF_BACKENDS:
+            self._send(503, {'error': 'No PDF library available (use ?format=html)'})
+            return
+
+        # Backpressure: reject instead of queueing without bound
+        if not server.slots.acquire(blocking=False):
+            with server.metrics.lock:
+                server.metrics.rejected += 1
+            self._send(503, {'error': 'Render queue full'}, headers={'Retry-After': '1'})
+            return
+
+        started = time.perf_counter()
+        with server.metrics.lock:
+            server.metrics.in_flight += 1
+        try:
+            body = server.render(payloads, output_format)
+        except Exception as e:
+            with server.metrics.lock:
+                server.metrics.failed += 1
+            self._send(500, {'error': f"{type(e).__name__}: {e}"})
+            return
+        finally:
+            server.slots.release()
+            with server.metrics.lock:
+                server.metrics.in_flight -= 1
+
+        with server.metrics.lock:
+            server.metrics.rendered += 1
+            server.metrics.render_seconds += time.perf_counter() - started
+
+        if output_format == 'html':
+            self._send(200, body, 'text/html; charset=utf-8')
+        else:
+            self._send(200, body, 'application/pdf',
+                       {'Content-Disposition': 'attachment; filename="data_quality_report.pdf"'})
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} - {format % args}")
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+VALUE_OPTIONS = {'host', 'port', 'workers', 'queue', 'folder', 'backend', 'template'}
+
+
+def main():
+    """Main program function"""
+    args, options = parse_args(sys.argv[1:], VALUE_OPTIONS)
+
+    backend = options.get('backend')
+    if backend is not None and backend not in available_backends() + ['browser']:
+        print(f"❌ PDF backend not available: {backend}")
+        sys.exit(1)
+
+    host = options.get('host', '127.0.0.1')
+    port = int(options.get('port', 8765))
+    server = ReportServer(
+        (host, port),
+        report_folder=options.get('folder', DEFAULT_REPORT_FOLDER),
+        backend=backend,
+        workers=int(options['workers']) if 'workers' in options else None,
+        queue_size=int(options.get('queue', 32)),
+        html_path=options.get('template')
+    )
+
+    print("=" * 60)
+    print("   Report Rendering Server")
+    print("=" * 60)
+    print(f"🔧 Backend: {server.backend}, workers: {server.workers}, queue: {server.queue_size}")
+    server.warm_up()
+    print(f"🌐 Listening on http://{host}:{port}")
+    print("   POST /render        - section JSON (single, list or full report) -> PDF")
+    print("   POST /render?format=html - same, returns filled HTML")
+    print("   GET  /health, /metrics")
+    print("   Press Ctrl+C to stop\n")
+
+    # Stop cleanly on SIGTERM too (e.g. from a service manager)
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping server")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
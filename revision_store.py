@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Revision Store - Reporting System
+Packs older section revisions into compressed segment files with an offset index
+"""
+
+import base64
+import gzip
+import json
+import os
+import time
+
+from section_index import KIND_FULL, KIND_SECTION
+
+ARCHIVE_FOLDER = ".archive"
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archived (
+    name TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    section_ids TEXT,
+    author TEXT,
+    timestamp TEXT,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+"""
+
+
+class RevisionStore:
+    """Hot latest revisions in saved_sections, older ones in gzip segments
+    
+    Each archived file is one gzip member appended to a segment file. A
+    segment is therefore a valid .jsonl.gz (one JSON record per line), and
+    the SQLite offset index lets a single revision be read by seeking to
+    its member. Content that is not UTF-8 is stored base64-encoded.
+    """
+    
+    def __init__(self, index, segment_max_bytes=SEGMENT_MAX_BYTES):
+        self.index = index
+        self.archive_folder = index.data_folder / ARCHIVE_FOLDER
+        self.segment_max_bytes = segment_max_bytes
+        index.execute_script(SCHEMA)
+    
+    def _current_segment(self):
+        """Segment file to append to, starting a new one when full"""
+        self.archive_folder.mkdir(exist_ok=True)
+        segments = sorted(self.archive_folder.glob("segment_*.jsonl.gz"))
+        if segments and segments[-1].stat().st_size < self.segment_max_bytes:
+            return segments[-1]
+        number = int(segments[-1].name[8:14]) + 1 if segments else 1
+        return self.archive_folder / f"segment_{number:06d}.jsonl.gz"
+    
+    def select_cold(self, keep_last=1, newer_than=None):
+        """Indexed files the retention policy moves out of the hot folder
+        
+        The newest keep_last per-section files of each section stay hot, and
+        so do the newest keep_last full reports containing each section. Files
+        modified within newer_than seconds and unrecognized files stay too.
+        """
+        keep_last = max(1, keep_last)
+        cutoff_ns = (time.time() - newer_than) * 1e9 if newer_than is not None else None
+        records = self.index.files()  # newest first
+        
+        hot = set()
+        section_groups = {}
+        full_groups = {}
+        for record in records:
+            if record['kind'] == KIND_SECTION and record['section_ids']:
+                section_groups.setdefault(record['section_ids'][0], []).append(record)
+            elif record['kind'] == KIND_FULL and record['section_ids']:
+                # A full report stays hot while it is among the newest for any of its sections
+                for section_id in record['section_ids']:
+                    full_groups.setdefault(section_id, []).append(record)
+            else:
+                hot.add(record['name'])
+            if cutoff_ns is not None and record['mtime_ns'] >= cutoff_ns:
+                hot.add(record['name'])
+        
+        for groups in (section_groups, full_groups):
+            for group in groups.values():
+                hot.update(record['name'] for record in group[:keep_last])
+        
+        return [record for record in records if record['name'] not in hot]
+    
+    def archive(self, records):
+        """Append records' files to segments and remove them from the hot folder"""
+        rows = []
+        f = None
+        try:
+            for record in records:
+                if f is None or f.tell() >= self.segment_max_bytes:
+                    if f is not None:
+                        self._sync_close(f)
+                    segment = self._current_segment()
+                    f = open(segment, 'ab')
+                
+                with open(self.index.path(record), 'rb') as src:
+                    content = src.read()
+                entry = {
+                    'name': record['name'],
+                    'mtime_ns': record['mtime_ns'],
+                    'sha256': record['sha256'],
+                }
+                try:
+                    entry['content'] = content.decode('utf-8')
+                except UnicodeDecodeError:
+                    entry['content_base64'] = base64.b64encode(content).decode('ascii')
+                line = json.dumps(entry) + '\n'
+                member = gzip.compress(line.encode('utf-8'))
+                
+                offset = f.tell()
+                f.write(member)
+                rows.append((record['name'], record['kind'], json.dumps(record['section_ids']),
+                             record['author'], record['timestamp'], record['mtime_ns'], record['size'],
+                             record['sha256'], segment.name, offset, len(member)))
+        finally:
+            if f is not None:
+                self._sync_close(f)
+        
+        self.index.execute_many(
+            "INSERT OR REPLACE INTO archived (name, kind, section_ids, author, timestamp, "
+            "mtime_ns, size, sha256, segment, offset, length) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        
+        # Only drop hot copies once they are durable in a segment and indexed
+        for row in rows:
+            (self.index.data_folder / row[0]).unlink()
+        
+        self.index.refresh()
+        return len(rows)
+    
+    @staticmethod
+    def _sync_close(f):
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+    
+    def compact(self, keep_last=1, newer_than=None):
+        """Apply retention policy; returns number of archived revisions"""
+        self.index.refresh()
+        return self.archive(self.select_cold(keep_last, newer_than))
+    
+    def archived_record(self, name):
+        rows = self.index.query("SELECT * FROM archived WHERE name = ?", (name,))
+        if not rows:
+            return None
+        record = rows[0]
+        record['section_ids'] = json.loads(record['section_ids'] or '[]')
+        return record
+    
+    def read(self, name):
+        """Return raw bytes of a revision, hot or archived (None if unknown)"""
+        hot = self.index.data_folder / name
+        if hot.exists():
+            return hot.read_bytes()
+        
+        record = self.archived_record(name)
+        if record is None:
+            return None
+        with open(self.archive_folder / record['segment'], 'rb') as f:
+            f.seek(record['offset'])
+            member = f.read(record['length'])
+        entry = json.loads(gzip.decompress(member))
+        if 'content_base64' in entry:
+            return base64.b64decode(entry['content_base64'])
+        return entry['content'].encode('utf-8')
+    
+    def restore(self, name):
+        """Write archived revision back into the hot folder; returns its path"""
+        record = self.archived_record(name)
+        content = self.read(name)
+        if content is None:
+            return None
+        path = self.index.data_folder / name
+        if not path.exists():
+            tmp = path.with_name(f".{name}.restore.tmp")
+            tmp.write_bytes(content)
+            if record is not None:
+                os.utime(tmp, ns=(record['mtime_ns'], record['mtime_ns']))
+            os.replace(tmp, path)
+        self.index.refresh()
+        return path
+    
+    def history(self, section_id):
+        """All revisions (hot and archived) containing section, newest first"""
+        revisions = [
+            dict(record, archived=False) for record in self.index.files()
+            if section_id in record['section_ids']
+        ]
+        # Restored revisions are both hot and archived; list them once
+        hot_names = {record['name'] for record in revisions}
+        for record in self.index.query("SELECT * FROM archived"):
+            record['section_ids'] = json.loads(record['section_ids'] or '[]')
+            if section_id in record['section_ids'] and record['name'] not in hot_names:
+                revisions.append(dict(record, archived=True))
+        revisions.sort(key=lambda record: record['mtime_ns'], reverse=True)
+        return revisions
+    
+    def hashes(self):
+        """Content hashes of all archived revisions"""
+        return {record['sha256'] for record in self.index.query("SELECT sha256 FROM archived")}
+    
+    def stats(self):
+        """Hot/archived counts and sizes"""
+        totals = self.index.query("SELECT COUNT(*) AS count, COALESCE(SUM(size), 0) AS raw FROM archived")[0]
+        count, raw = totals['count'], totals['raw']
+        segments = list(self.archive_folder.glob("segment_*.jsonl.gz")) if self.archive_folder.exists() else []
+        return {
+            'hot_files': self.index.count(),
+            'archived_revisions': count,
+            'archived_raw_bytes': raw,
+            'segments': len(segments),
+            'segment_bytes': sum(segment.stat().st_size for segment in segments),
+        }
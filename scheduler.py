@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Fair Scheduler - Reporting System
+Interleaves jobs of different tenants round-robin on a shared worker pool
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, wait
+
+
+class FairScheduler:
+    """Submit jobs to an executor one tenant at a time, round-robin
+    
+    Only max_in_flight jobs are handed to the executor at once, so a tenant
+    queueing hundreds of jobs cannot fill the executor queue: every free
+    slot goes to the next tenant in turn that still has work.
+    """
+    
+    def __init__(self, executor, max_in_flight):
+        self.executor = executor
+        self.max_in_flight = max(1, max_in_flight)
+    
+    def run(self, jobs, func, tenant_of=lambda job: job.get('tenant')):
+        """Run func(job) for every job; yields (job index, future) as they finish
+        
+        If the executor breaks (e.g. a worker process crashed), jobs not yet
+        submitted are never yielded; the caller can run them again elsewhere.
+        """
+        queues = {}
+        for i, job in enumerate(jobs):
+            queues.setdefault(tenant_of(job), deque()).append((i, job))
+        rotation = deque(queues)
+        
+        in_flight = {}
+        while rotation or in_flight:
+            while rotation and len(in_flight) < self.max_in_flight:
+                tenant = rotation.popleft()
+                i, job = queues[tenant].popleft()
+                try:
+                    in_flight[self.executor.submit(func, job)] = i
+                except BrokenExecutor:
+                    rotation.clear()
+                    break
+                if queues[tenant]:
+                    rotation.append(tenant)
+            
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield in_flight.pop(future), future
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Section Index - Reporting System
+Persistent SQLite index of saved_sections (section id, author, timestamp, mtime, size, hash)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from ingest import QUARANTINE_FOLDER, quarantine
+from json_header import lazy_object, read_metadata
+from render_cache import file_sha256
+from section_schema import SchemaError, validate, without_rendered
+
+INDEX_FILENAME = ".section_index.db"
+# Bumped when the way files are classified changes, to re-index every file
+INDEX_VERSION = 2
+# Seconds to wait for another process's write transaction on the index
+DB_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    author TEXT,
+    timestamp TEXT,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    name TEXT NOT NULL REFERENCES files(name) ON DELETE CASCADE,
+    section_id TEXT NOT NULL,
+    author TEXT,
+    timestamp TEXT,
+    PRIMARY KEY (name, section_id)
+);
+CREATE TABLE IF NOT EXISTS validated (
+    sha256 TEXT PRIMARY KEY
+);
+CREATE INDEX IF NOT EXISTS entries_section ON entries(section_id);
+CREATE INDEX IF NOT EXISTS files_mtime ON files(mtime_ns);
+"""
+
+# File kinds
+KIND_SECTION = 'section'
+KIND_FULL = 'full'
+KIND_OTHER = 'other'
+KIND_INVALID = 'invalid'
+
+
+def describe_section_file(data):
+    """Extract (kind, author, timestamp, entries) from parsed section metadata
+
+    Files that do not match the section schema are KIND_INVALID and have no
+    entries, so they are never picked for a render.
+    """
+    if not isinstance(data, dict):
+        return KIND_INVALID, None, None, []
+    if 'sections' in data or 'sectionId' in data:
+        try:
+            validate(data, metadata=True)
+        except SchemaError:
+            return KIND_INVALID, None, None, []
+
+    if isinstance(data.get('sections'), dict):
+        entries = []
+        for section_id, section in data['sections'].items():
+            if isinstance(section, dict):
+                entries.append((section_id, section.get('author'), section.get('timestamp')))
+        return KIND_FULL, data.get('author'), data.get('savedAt'), entries
+
+    if 'sectionId' in data:
+        entry = (data['sectionId'], data.get('author'), data.get('timestamp'))
+        return KIND_SECTION, data.get('author'), data.get('timestamp'), [entry]
+
+    return KIND_OTHER, data.get('author'), None, []
+
+
+class SectionIndex:
+    """Incrementally updated index of section files in one folder"""
+
+    def __init__(self, data_folder):
+        self.data_folder = Path(data_folder)
+        self.db_path = self.data_folder / INDEX_FILENAME
+        self._conn = None
+        self._lock = threading.RLock()
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.db_path), timeout=DB_TIMEOUT, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < INDEX_VERSION:
+                self._conn.execute("DELETE FROM files")
+                self._conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+                self._conn.commit()
+        return self._conn
+
+    def close(self):
+        """Close database connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def refresh(self):
+        """Sync index with folder contents, re-reading only new or changed files
+
+        Changed files are read and hashed before the write transaction
+        starts, so other processes sharing the index are blocked only
+        while the rows are written.
+        """
+        with self._lock:
+            conn = self.conn
+            known = {
+                row['name']: (row['mtime_ns'], row['size'])
+                for row in conn.execute("SELECT name, mtime_ns, size FROM files")
+            }
+
+            file_rows = []
+            entry_rows = []
+            present = set()
+            with os.scandir(self.data_folder) as it:
+                for entry in it:
+                    if not entry.name.endswith('.json') or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    present.add(entry.name)
+                    if known.get(entry.name) == (stat.st_mtime_ns, stat.st_size):
+                        continue
+                    described = self._describe_file(entry.name, entry.path, stat)
+                    if described is not None:
+                        file_rows.append(described[0])
+                        entry_rows.extend(described[1])
+
+            removed = [name for name in known if name not in present]
+            with conn:
+                conn.executemany("DELETE FROM files WHERE name = ?",
+                                 [(name,) for name in removed] + [row[:1] for row in file_rows])
+                conn.executemany(
+                    "INSERT INTO files (name, kind, author, timestamp, mtime_ns, size, sha256) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    file_rows
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO entries (name, section_id, author, timestamp) VALUES (?, ?, ?, ?)",
+                    entry_rows
+                )
+            return len(file_rows), len(removed)
+
+    @staticmethod
+    def _describe_file(name, path, stat):
+        """(files row, entries rows) of a section file; None if it cannot be read"""
+        try:
+            data, sha256 = read_metadata(path)
+        except ValueError:
+            data, sha256 = None, file_sha256(path)
+        except OSError:
+            return None
+
+        kind, author, timestamp, entries = describe_section_file(data)
+        file_row = (name, kind, author, timestamp, stat.st_mtime_ns, stat.st_size, sha256)
+        entry_rows = [(name, section_id, entry_author, entry_timestamp)
+                      for section_id, entry_author, entry_timestamp in entries]
+        return file_row, entry_rows
+
+    def latest(self, section_id, kind=None):
+        """Return newest indexed file containing section (optionally of given kind)"""
+        query = (
+            "SELECT f.*, e.section_id FROM entries e JOIN files f ON f.name = e.name "
+            "WHERE e.section_id = ?"
+        )
+        params = [section_id]
+        if kind is not None:
+            query += " AND f.kind = ?"
+            params.append(kind)
+        query += " ORDER BY f.mtime_ns DESC, f.name DESC LIMIT 1"
+
+        with self._lock:
+            row = self.conn.execute(query, params).fetchone()
+        return dict(row) if row else None
+
+    def latest_many(self, section_ids):
+        """Newest indexed file for each section (any kind) in one query"""
+        section_ids = list(section_ids)
+        if not section_ids:
+            return {}
+        placeholders = ', '.join('?' * len(section_ids))
+        query = (
+            "SELECT * FROM ("
+            "  SELECT f.*, e.section_id, e.author AS section_author, e.timestamp AS section_timestamp,"
+            "  ROW_NUMBER() OVER ("
+            "    PARTITION BY e.section_id ORDER BY f.mtime_ns DESC, f.name DESC) AS rank "
+            "  FROM entries e JOIN files f ON f.name = e.name "
+            f"  WHERE e.section_id IN ({placeholders})"
+            ") WHERE rank = 1"
+        )
+        with self._lock:
+            rows = self.conn.execute(query, section_ids).fetchall()
+        found = {row['section_id']: dict(row) for row in rows}
+        return {section_id: found.get(section_id) for section_id in section_ids}
+
+    def forget(self, name):
+        """Drop a file from the index (until it changes again)"""
+        with self._lock:
+            self.conn.execute("DELETE FROM files WHERE name = ?", (name,))
+            self.conn.commit()
+
+    def mark_valid(self, hashes):
+        """Record content hashes of files that passed full schema validation"""
+        self.execute_many("INSERT OR IGNORE INTO validated (sha256) VALUES (?)", [(sha256,) for sha256 in hashes])
+
+    def is_valid(self, sha256):
+        """True if content with this hash passed full schema validation before"""
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM validated WHERE sha256 = ?", (sha256,)).fetchone() is not None
+
+    def hashes(self):
+        """Content hashes of all indexed files"""
+        with self._lock:
+            return {row[0] for row in self.conn.execute("SELECT sha256 FROM files")}
+
+    def files(self, limit=None, offset=0):
+        """Return indexed files newest first, with the section ids each contains"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT f.*, GROUP_CONCAT(e.section_id, char(31)) AS section_ids "
+                "FROM files f LEFT JOIN entries e ON e.name = f.name "
+                "GROUP BY f.name ORDER BY f.mtime_ns DESC, f.name DESC LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset)
+            ).fetchall()
+
+        records = []
+        for row in rows:
+            record = dict(row)
+            record['section_ids'] = record['section_ids'].split('\x1f') if record['section_ids'] else []
+            records.append(record)
+        return records
+
+    def count(self):
+        """Number of indexed files"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def execute_script(self, script):
+        """Run SQL script (e.g. CREATE TABLE for tables kept next to the index)"""
+        with self._lock:
+            self.conn.executescript(script)
+
+    def execute_many(self, sql, rows):
+        """Run a statement for every row in one committed transaction"""
+        with self._lock:
+            self.conn.executemany(sql, rows)
+            self.conn.commit()
+
+    def query(self, sql, params=()):
+        """Return result rows of a query as dicts"""
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def path(self, record):
+        """Absolute path of indexed file record"""
+        return self.data_folder / record['name']
+
+
+class SectionResolver:
+    """Resolve many sections at once, parsing each source file at most once
+
+    The newest file containing a section wins, whether it is a per-section
+    file or a full report. Parsed files are checked against the full
+    schema unless content with the same hash already passed (e.g. at
+    ingest); the index only checks metadata.
+    """
+
+    def __init__(self, index, refresh=True):
+        self.index = index
+        if refresh:
+            index.refresh()
+        self._parsed = {}
+        self._metadata = {}  # files parsed without their field values
+
+    def records(self, section_ids):
+        """Selected index record (or None) per section"""
+        return self.index.latest_many(section_ids)
+
+    def load_file(self, record):
+        """Parsed and validated content of an indexed file (cached for this run)
+
+        Raises SchemaError when the file is not valid section JSON.
+        """
+        data = self._parsed.get(record['name'])
+        if data is None:
+            with open(self.index.path(record), 'rb') as f:
+                content = f.read()
+            try:
+                data = json.loads(content.decode('utf-8'))
+            except ValueError as e:  # also UnicodeDecodeError
+                raise SchemaError(f"invalid JSON: {e}") from None
+            sha256 = hashlib.sha256(content).hexdigest()
+            if not self.index.is_valid(sha256):
+                validate(data)
+                self.index.mark_valid([sha256])
+            self._parsed[record['name']] = data
+        return data
+
+    def checked_record(self, section_id, record):
+        """record if its file is valid, else the newest valid revision of the section
+
+        Invalid files are moved to the quarantine folder and dropped from the index.
+        """
+        while record is not None:
+            try:
+                self.load_file(record)
+                return record
+            except SchemaError as e:
+                print(f"🚫 Quarantined {record['name']}: {e}")
+                try:
+                    quarantine(self.index.path(record), self.index.data_folder / QUARANTINE_FOLDER, e)
+                except FileNotFoundError:
+                    pass  # moved by a concurrent render
+            except FileNotFoundError:
+                pass
+            self.index.forget(record['name'])
+            record = self.index.latest(section_id)
+        return None
+
+    def section_data(self, section_id, record):
+        """Data of one section from its selected record"""
+        data = self.load_file(record)
+        if record['kind'] == KIND_FULL:
+            return data['sections'][section_id]
+        return data
+
+    def lazy_section_data(self, section_id, record):
+        """Section data whose field values are read from the file only when iterated
+
+        Field values are not validated here, so render-ready values are
+        left out and the raw values are escaped while the HTML is written.
+        """
+        path = self.index.path(record)
+        data = self._metadata.get(record['name'])
+        if data is None:
+            data, _ = read_metadata(path)
+            self._metadata[record['name']] = data
+        key_path = ('sections', section_id) if record['kind'] == KIND_FULL else ()
+        section = dict(without_rendered(data['sections'][section_id] if key_path else data))
+        try:
+            section['fields'] = lazy_object(path, key_path + ('fields',))
+        except KeyError:
+            pass
+        return section
+
+
+def record_summary(record):
+    """JSON-serializable view of an index record"""
+    return {
+        'file': record['name'],
+        'kind': record['kind'],
+        'sections': record.get('section_ids', []),
+        'author': record['author'],
+        'timestamp': record['timestamp'],
+        'modified': datetime.fromtimestamp(record['mtime_ns'] / 1e9).isoformat(),
+        'size': record['size'],
+        'sha256': record['sha256'],
+    }
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Section Schema - Reporting System
+Validation of section JSON and render-ready (HTML-escaped) field values
+"""
+
+import html
+import json
+import re
+from datetime import datetime
+
+# Key holding the render-ready copy of a section, next to the raw values
+RENDERED_KEY = 'rendered'
+DATE_FORMAT = '%Y-%m-%d %H:%M'
+
+# Markup or an entity html.escape(quote=False) would not produce
+UNESCAPED_PATTERN = re.compile(r'[<>]|&(?!(?:amp|lt|gt);)')
+
+
+class SchemaError(ValueError):
+    """Section JSON does not match the schema"""
+
+
+# Schema nodes: 'type', optional 'keys' (known object keys), 'required',
+# 'values' (schema of every value of an object) and 'format'
+RENDERED_SCHEMA = {
+    'type': dict,
+    'required': ('fields',),
+    'keys': {
+        'fields': {'type': dict, 'values': {'type': str, 'format': 'escaped'}},
+        'author': {'type': str, 'format': 'escaped'},
+        'date': {'type': str, 'format': 'escaped'},
+    },
+}
+
+SECTION_SCHEMA = {
+    'type': dict,
+    'required': ('sectionId', 'fields'),
+    'keys': {
+        'sectionId': {'type': str, 'format': 'id'},
+        'author': {'type': str},
+        'timestamp': {'type': str, 'format': 'datetime'},
+        'fields': {'type': dict, 'values': {'type': str}},
+        RENDERED_KEY: RENDERED_SCHEMA,
+    },
+}
+
+FULL_REPORT_SCHEMA = {
+    'type': dict,
+    'required': ('sections',),
+    'keys': {
+        'author': {'type': str},
+        'savedAt': {'type': str, 'format': 'datetime'},
+        'sections': {'type': dict, 'values': dict(SECTION_SCHEMA, required=('fields',))},
+    },
+}
+
+TYPE_NAMES = {dict: 'an object', list: 'an array', str: 'a string'}
+
+
+def _check_format(name):
+    if name == 'datetime':
+        def check(value, path):
+            try:
+                datetime.fromisoformat(value)
+            except ValueError:
+                raise SchemaError(f"{path}: invalid timestamp {value!r}") from None
+    elif name == 'escaped':
+        def check(value, path):
+            match = UNESCAPED_PATTERN.search(value)
+            if match:
+                raise SchemaError(f"{path}: unescaped {match.group()!r} in render-ready value")
+    elif name == 'id':
+        def check(value, path):
+            if not value or value != value.strip():
+                raise SchemaError(f"{path}: invalid id {value!r}")
+    else:
+        raise ValueError(f"Unknown format: {name}")
+    return check
+
+
+def compile_schema(node, skip_keys=()):
+    """Turn a schema node into a check(value, path) function
+
+    The schema is walked once here, so validating a file is a chain of
+    plain function calls. Keys in skip_keys are neither required nor checked
+    (used for metadata read without its field values). Unknown keys are allowed.
+    """
+    expected = node['type']
+    type_name = TYPE_NAMES.get(expected, expected.__name__)
+    checks = []
+
+    if 'format' in node:
+        checks.append(_check_format(node['format']))
+
+    if 'keys' in node or 'required' in node:
+        required = [key for key in node.get('required', ()) if key not in skip_keys]
+        keys = {key: compile_schema(child, skip_keys)
+                for key, child in node.get('keys', {}).items() if key not in skip_keys}
+
+        def check_keys(value, path):
+            for key in required:
+                if key not in value:
+                    raise SchemaError(f"{path}: missing '{key}'")
+            for key, check in keys.items():
+                if key in value:
+                    check(value[key], f"{path}.{key}")
+        checks.append(check_keys)
+
+    if 'values' in node:
+        check_value = compile_schema(node['values'], skip_keys)
+
+        def check_values(value, path):
+            for key, item in value.items():
+                check_value(item, f"{path}.{key}")
+        checks.append(check_values)
+
+    def check(value, path='$'):
+        if not isinstance(value, expected):
+            raise SchemaError(f"{path}: expected {type_name}")
+        for check_part in checks:
+            check_part(value, path)
+    return check
+
+
+check_section = compile_schema(SECTION_SCHEMA)
+check_full_report = compile_schema(FULL_REPORT_SCHEMA)
+check_section_metadata = compile_schema(SECTION_SCHEMA, skip_keys=('fields',))
+check_full_report_metadata = compile_schema(FULL_REPORT_SCHEMA, skip_keys=('fields',))
+
+
+def is_section_payload(data):
+    """True for single-section and full-report payloads (the ones with a schema)"""
+    return isinstance(data, dict) and ('sections' in data or 'sectionId' in data)
+
+
+def validate(data, metadata=False):
+    """Check a single-section or full-report payload; raises SchemaError
+
+    Other objects (e.g. report_complete_* markers) are not checked; like
+    the index, they are kept as they are. With metadata=True field values
+    are not checked (they are skipped when reading metadata with
+    json_header.read_metadata).
+    """
+    if not isinstance(data, dict):
+        raise SchemaError("$: expected an object")
+    if 'sections' in data:
+        (check_full_report_metadata if metadata else check_full_report)(data)
+    elif 'sectionId' in data:
+        (check_section_metadata if metadata else check_section)(data)
+
+
+def escape_value(value):
+    """HTML-escape a field value (a string or an iterable of string pieces)
+
+    Any other value (e.g. a number) is escaped as its str().
+    """
+    if isinstance(value, str):
+        return html.escape(value, quote=False)
+    if isinstance(value, (dict, list)) or not hasattr(value, '__iter__'):
+        return html.escape(str(value), quote=False)
+    return (html.escape(str(piece), quote=False) for piece in value)
+
+
+def render_section(section):
+    """Render-ready values of a section: escaped fields, author and formatted date"""
+    rendered = {
+        'fields': {field_id: escape_value(value) for field_id, value in section.get('fields', {}).items()}
+    }
+    if 'author' in section and 'timestamp' in section:
+        rendered['author'] = escape_value(section['author'])
+        rendered['date'] = datetime.fromisoformat(section['timestamp']).strftime(DATE_FORMAT)
+    return rendered
+
+
+def without_rendered(section):
+    """Section data without its render-ready values"""
+    if RENDERED_KEY not in section:
+        return section
+    return {key: value for key, value in section.items() if key != RENDERED_KEY}
+
+
+def normalize(data):
+    """Validated copy of a payload with render-ready values stored next to the raw ones"""
+    validate(data)
+    if 'sections' in data:
+        sections = {}
+        for section_id, section in data['sections'].items():
+            section = dict(without_rendered(section))
+            section[RENDERED_KEY] = render_section(section)
+            sections[section_id] = section
+        return dict(data, sections=sections)
+    data = dict(without_rendered(data))
+    data[RENDERED_KEY] = render_section(data)
+    return data
+
+
+def normalize_file(path):
+    """Read, validate and normalize a section file; returns the new file content as bytes
+
+    Files that are not section payloads are returned unchanged.
+    Raises SchemaError for invalid JSON or content.
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+    try:
+        data = json.loads(content.decode('utf-8-sig'))
+    except ValueError as e:  # also UnicodeDecodeError
+        raise SchemaError(f"invalid JSON: {e}") from None
+    if not is_section_payload(data):
+        validate(data)
+        return content
+    return json.dumps(normalize(data), ensure_ascii=False, indent=2).encode('utf-8')
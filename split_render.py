@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Split Render - Reporting System
+Renders the cover and each section as separate PDFs in parallel worker
+processes and stitches them into one PDF with page labels and a table of contents
+"""
+
+import hashlib
+import html
+import importlib.util
+import os
+import re
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+
+from render_cache import RenderCache
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                 'link', 'meta', 'source', 'track', 'wbr'}
+
+# Section containers in rendered HTML; scripts are matched only to skip them
+SECTION_START_PATTERN = re.compile(
+    r'<script\b.*?</script>'
+    r'|<(?P<tag>\w+)\b[^>]*\bdata-section-id="(?P<section>[^"]+)"[^>]*>',
+    re.DOTALL
+)
+TITLE_PATTERN = re.compile(r'<h[1-3]\b[^>]*>(.*?)</h[1-3]>', re.DOTALL)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+TOC_TEMPLATE = """
+        <div class="section report-toc">
+            <div class="section-header">
+                <h2>Contents</h2>
+            </div>
+            <div class="section-content">
+                <table style="width: 100%; border-collapse: collapse;">
+{rows}
+                </table>
+            </div>
+        </div>
+"""
+TOC_ROW = '                    <tr><td>{title}</td><td style="text-align: right;">{page}</td></tr>'
+
+
+def split_available():
+    """Check whether pypdf (needed to stitch fragments) is installed"""
+    return importlib.util.find_spec('pypdf') is not None
+
+
+class _OpenElements(HTMLParser):
+    """Track elements still open at the end of the fed HTML"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.stack = []  # (tag, raw start tag)
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_ELEMENTS:
+            self.stack.append((tag, self.get_starttag_text()))
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                del self.stack[i:]
+                break
+
+
+def element_end(html_content, start, tag):
+    """End offset of the element whose start tag begins at start"""
+    depth = 0
+    for match in re.finditer(rf'<(/?){tag}\b[^>]*>', html_content[start:], re.IGNORECASE):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return start + match.end()
+    return len(html_content)
+
+
+class ReportParts:
+    """Filled report HTML split into lead (header), sections and trail (sign-offs)"""
+
+    def __init__(self, html_content, section_ids):
+        self.sections = []  # (section id, title, element html)
+        wanted = set(section_ids)
+        spans = []
+        position = 0
+        for match in SECTION_START_PATTERN.finditer(html_content):
+            if match.start() < position or match.group('section') not in wanted:
+                continue
+            end = element_end(html_content, match.start(), match.group('tag'))
+            spans.append((match.group('section'), match.start(), end))
+            position = end
+
+        if not spans:
+            self.lead, self.trail = html_content, ''
+            self.doc_head = self.wrappers_open = self.wrappers_close = ''
+            return
+
+        self.lead = html_content[:spans[0][1]]
+        self.trail = html_content[spans[-1][2]:]
+        for section_id, start, end in spans:
+            element = html_content[start:end]
+            title = TITLE_PATTERN.search(element)
+            title = html.unescape(TAG_PATTERN.sub('', title.group(1))).strip() if title else section_id
+            self.sections.append((section_id, title, element))
+
+        # Elements wrapping the sections (html, body, containers), to rebuild
+        # a standalone document around each section
+        parser = _OpenElements()
+        parser.feed(self.lead)
+        stack = parser.stack
+        body = next((i for i, (tag, _) in enumerate(stack) if tag == 'body'), None)
+        if body is None:
+            self.doc_head = ''
+            wrappers = stack
+        else:
+            raw_body = stack[body][1]
+            self.doc_head = self.lead[:self.lead.find(raw_body) + len(raw_body)]
+            wrappers = stack[body + 1:]
+        self.wrappers_open = ''.join(raw for _, raw in wrappers)
+        self.wrappers_close = ''.join(f"</{tag}>" for tag, _ in reversed(stack))
+
+    def section_document(self, element):
+        return self.doc_head + self.wrappers_open + element + self.wrappers_close
+
+    def trail_document(self):
+        return self.doc_head + self.wrappers_open + self.trail
+
+    def cover_document(self, toc):
+        """Header part of the report followed by a table of contents
+
+        toc is a list of (title, page) with pages numbered from the first
+        page after the cover.
+        """
+        rows = '\n'.join(TOC_ROW.format(title=html.escape(title), page=page) for title, page in toc)
+        return self.lead + TOC_TEMPLATE.format(rows=rows) + self.wrappers_close
+
+
+# Worker process state (set by _init_worker)
+_worker_generator = None
+
+
+def _init_worker(report_folder, backend):
+    """Create one generator per worker so the PDF backend is loaded once"""
+    global _worker_generator
+    from report_generator import ReportGenerator
+    _worker_generator = ReportGenerator(report_folder, backend=backend)
+
+
+def _render_in_worker(html_content, output_path):
+    _worker_generator.render_pdf(html_content, output_path)
+    return output_path
+
+
+def page_count(path):
+    from pypdf import PdfReader
+    return len(PdfReader(str(path)).pages)
+
+
+def stitch(cover_path, fragments, output_path):
+    """Concatenate cover and (title, path) fragments into output_path
+
+    Cover pages are labelled i, ii, ... and the rest 1, 2, ... so viewer page
+    numbers match the table of contents; each titled fragment gets a bookmark.
+    """
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    writer.append(str(cover_path))
+    cover_pages = len(writer.pages)
+    for title, path in fragments:
+        writer.append(str(path), outline_item=title or None)
+
+    writer.set_page_label(0, cover_pages - 1, style='/r', start=1)
+    if len(writer.pages) > cover_pages:
+        writer.set_page_label(cover_pages, len(writer.pages) - 1, style='/D', start=1)
+
+    output_path = Path(output_path)
+    tmp = output_path.with_name(f".{output_path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp, 'wb') as f:
+        writer.write(f)
+    os.replace(tmp, output_path)
+
+
+class SplitRenderer:
+    """Render report sections as separate PDFs in parallel and stitch them
+
+    Fragments are cached by the hash of their HTML, so sections whose
+    content did not change are reused from earlier renders.
+    """
+
+    def __init__(self, generator, css, workers=None):
+        self.generator = generator
+        self.css = css
+        self.workers = workers or os.cpu_count() or 1
+
+    def fragment_key(self, html_content):
+        digest = hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+        return RenderCache.make_key(digest, f"{self.generator.pdf_method}:fragment", self.css, {})
+
+    def render_fragments(self, documents, scratch, name='fragment'):
+        """Render HTML documents to PDFs in scratch; returns (paths, reused count)"""
+        cache = self.generator.cache
+        paths = []
+        todo = []
+        for i, document in enumerate(documents):
+            key = self.fragment_key(document)
+            path = Path(scratch) / f"{name}_{i:03d}.pdf"
+            paths.append(path)
+            if not cache.fetch(key, path):
+                todo.append((key, document, path))
+
+        if len(todo) == 1 or self.workers <= 1:
+            for _, document, path in todo:
+                self.generator.render_pdf(document, path)
+        elif todo:
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(todo)),
+                initializer=_init_worker,
+                initargs=(str(self.generator.report_folder), self.generator.pdf_method)
+            ) as pool:
+                futures = [pool.submit(_render_in_worker, document, str(path)) for _, document, path in todo]
+                for future in futures:
+                    future.result()
+
+        for key, _, path in todo:
+            cache.store(key, path)
+        return paths, len(documents) - len(todo)
+
+    def render(self, html_content, output_path, section_ids):
+        """Render html_content to output_path; returns number of reused fragments"""
+        if not split_available():
+            raise RuntimeError("Split rendering needs pypdf (pip install pypdf)")
+
+        parts = ReportParts(html_content, section_ids)
+        if not parts.sections:
+            self.generator.render_pdf(html_content, output_path)
+            return 0
+
+        documents = [parts.section_document(element) for _, _, element in parts.sections]
+        titles = [title for _, title, _ in parts.sections]
+        if parts.trail.strip():
+            documents.append(parts.trail_document())
+            titles.append(None)
+
+        with tempfile.TemporaryDirectory(prefix='.split_', dir=self.generator.output_folder) as scratch:
+            paths, reused = self.render_fragments(documents, scratch)
+
+            # Cover goes last: its table of contents needs the section page counts
+            toc = []
+            page = 1
+            for title, path in zip(titles, paths):
+                if title:
+                    toc.append((title, page))
+                page += page_count(path)
+            (cover_path,), cover_reused = self.render_fragments([parts.cover_document(toc)], scratch, 'cover')
+
+            stitch(cover_path, list(zip(titles, paths)), output_path)
+        return reused + cover_reused
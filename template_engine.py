@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Template Engine - Reporting System
+Compiles the report HTML template once into static chunks and named slots
+"""
+
+import hashlib
+import os
+import re
+from pathlib import Path
+
+# Field views (<div ... id="{field}-view">...</div>) and section metadata
+# spans (<span id="{prefix}-author">...</span>, <span id="{prefix}-date">...</span>)
+SLOT_PATTERN = re.compile(
+    r'(?P<open><div[^>]*\bid="(?P<view>[^"]+-view)"[^>]*>)(?P<view_body>.*?)</div>'
+    r'|(?P<span_open><span[^>]*\bid="(?P<meta>[^"]+-(?:author|date))"[^>]*>)(?P<meta_body>[^<]*)</span>',
+    re.DOTALL
+)
+
+# Section containers (data-section-id="...") and the slot ids inside them;
+# scripts are matched only to skip ids built in JavaScript
+REGISTRY_PATTERN = re.compile(
+    r'<script\b.*?</script>'
+    r'|\bdata-section-id="(?P<section>[^"]+)"'
+    r'|\bid="(?P<slot>[^"]+)-(?P<suffix>view|author|date)"',
+    re.DOTALL
+)
+
+# Full report downloads, as opposed to "{section_id}_*.json" single sections
+FULL_REPORT_PREFIXES = ('report_complete', 'data_quality_report_full')
+
+
+class SectionRegistry:
+    """Sections of a template with their field ids and metadata prefix"""
+
+    def __init__(self, html_content):
+        self.prefixes = {}  # section id -> prefix of its -author/-date spans
+        self.fields = {}  # section id -> field ids (without -view)
+
+        section_id = None
+        for match in REGISTRY_PATTERN.finditer(html_content):
+            if match.group('slot') is None and match.group('section') is None:
+                continue
+            if match.group('section'):
+                section_id = match.group('section')
+                self.fields.setdefault(section_id, [])
+                continue
+            if section_id is None:
+                continue
+
+            name, suffix = match.group('slot'), match.group('suffix')
+            if suffix == 'view':
+                self.fields[section_id].append(name)
+            else:
+                self.prefixes.setdefault(section_id, name)
+
+        self.section_ids = list(self.fields)
+        self.download_pattern = re.compile(
+            '(?:' + '|'.join([re.escape(section_id) for section_id in self.section_ids]
+                             + list(FULL_REPORT_PREFIXES)) + r')_.*\.json'
+        )
+
+    def prefix(self, section_id):
+        """Prefix of section's author/date slots"""
+        return self.prefixes.get(section_id, section_id)
+
+
+def value_pieces(value):
+    """String pieces of a slot value: a string, an iterable of pieces, or anything else as str()"""
+    if isinstance(value, str):
+        return (value,)
+    if isinstance(value, (dict, list)) or not hasattr(value, '__iter__'):
+        return (str(value),)
+    return (piece if isinstance(piece, str) else str(piece) for piece in value)
+
+
+class CompiledTemplate:
+    """HTML template split into static chunks and replaceable slots"""
+
+    def __init__(self, html_content):
+        self.source = html_content
+        self.digest = hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+        self.parts = []
+        self.slots = {}  # slot id -> index in self.parts
+        self.defaults = {}  # slot id -> original template content
+
+        position = 0
+        for match in SLOT_PATTERN.finditer(html_content):
+            if match.group('view'):
+                slot_id = match.group('view')
+                self.parts.append(html_content[position:match.end('open')])
+                default = match.group('view_body')
+                tail = '</div>'
+            else:
+                slot_id = match.group('meta')
+                self.parts.append(html_content[position:match.end('span_open')])
+                default = match.group('meta_body')
+                tail = '</span>'
+
+            self.slots[slot_id] = len(self.parts)
+            self.defaults[slot_id] = default
+            self.parts.append(default)
+            self.parts.append(tail)
+            position = match.end()
+
+        self.parts.append(html_content[position:])
+        self.registry = SectionRegistry(html_content)
+
+    def render(self, values):
+        """Render template, replacing slots found in values (slot id -> text)"""
+        parts = self.parts.copy()
+        slots = self.slots
+        for slot_id, value in values.items():
+            index = slots.get(slot_id)
+            if index is not None:
+                parts[index] = value if isinstance(value, str) else ''.join(value_pieces(value))
+        return ''.join(parts)
+
+    def render_to(self, f, values):
+        """Write rendered template to a file-like object chunk by chunk
+
+        Values may be strings or iterables of string pieces (e.g. lazily
+        read JSON fields), so large values are never joined in memory.
+        Other values are written as their str(). Returns number of
+        characters written.
+        """
+        written = 0
+        slot_indexes = {index: slot_id for slot_id, index in self.slots.items()}
+        for index, part in enumerate(self.parts):
+            slot_id = slot_indexes.get(index)
+            value = values.get(slot_id, part) if slot_id is not None else part
+            for piece in value_pieces(value):
+                f.write(piece)
+                written += len(piece)
+        return written
+
+
+# Compiled templates shared by all renders in this process
+_template_cache = {}
+
+
+def load_template(html_path):
+    """Return compiled template for file, recompiling only when it changes"""
+    path = str(Path(html_path).resolve())
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _template_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        template = CompiledTemplate(f.read())
+
+    _template_cache[path] = (key, template)
+    return template
+
+
+def load_registry(html_path):
+    """Section registry of a template file (None if the file does not exist)"""
+    if not os.path.exists(html_path):
+        return None
+    return load_template(html_path).registry
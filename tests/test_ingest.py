@@ -0,0 +1,63 @@
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from file_manager import FileManager
+from ingest import QUARANTINE_FOLDER, BulkIngest
+from render_cache import file_sha256
+from section_schema import normalize_file
+
+SECTION = {
+    'sectionId': 'overall-assessment',
+    'author': 'Jane Smith',
+    'timestamp': '2024-01-01T10:00:00',
+    'fields': {'overall-score': '7 < 10'},
+}
+
+
+def test_raw_duplicate_of_a_file_stored_before_normalization_is_skipped(tmp_path):
+    saved = tmp_path / "saved_sections"
+    downloads = tmp_path / "Downloads"
+    saved.mkdir()
+    downloads.mkdir()
+    source = downloads / "overall-assessment_1.json"
+    source.write_text(json.dumps(SECTION), encoding='utf-8')
+    # Raw file stored as-is by an ingest without normalization
+    stored_raw = file_sha256(source)
+
+    [result] = BulkIngest(saved, {stored_raw}, normalize=normalize_file).run([source])
+
+    assert result.status == 'duplicate'
+    assert not source.exists()
+    assert list(saved.iterdir()) == []
+
+
+def test_normalized_duplicate_is_skipped(tmp_path):
+    saved = tmp_path / "saved_sections"
+    saved.mkdir()
+    first = tmp_path / "overall-assessment_1.json"
+    second = tmp_path / "overall-assessment_2.json"
+    first.write_text(json.dumps(SECTION), encoding='utf-8')
+    second.write_text(json.dumps(SECTION), encoding='utf-8')
+
+    ingest = BulkIngest(saved, normalize=normalize_file, workers=1)
+    results = ingest.run([first, second])
+
+    assert [result.status for result in results] == ['moved', 'duplicate']
+
+
+def test_completion_marker_is_ingested_unchanged(tmp_path):
+    marker = tmp_path / "report_complete_1700000000000.json"
+    content = json.dumps({'completed': True, 'completedAt': '2024-01-01T10:00:00Z', 'completedBy': 'Jane Smith'})
+    marker.write_text(content, encoding='utf-8')
+    manager = FileManager(tmp_path)
+
+    [result] = manager.ingest([marker])
+
+    assert result.status == 'moved'
+    assert result.dest.read_text(encoding='utf-8') == content
+    assert manager.validate_saved_sections() == []
+    assert not (manager.saved_sections / QUARANTINE_FOLDER).exists()
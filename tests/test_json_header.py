@@ -0,0 +1,28 @@
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import json_header
+
+
+def test_read_metadata_with_chunk_boundary_inside_numbers(tmp_path, monkeypatch):
+    data = {
+        'sectionId': 'summary',
+        'version': 12.5,
+        'scores': [-3, 1e10, 0.25, True, None],
+        'fields': {'text': 'skipped'},
+        'count': 1024,
+    }
+    path = tmp_path / "section.json"
+    path.write_text(json.dumps(data, indent=2), encoding='utf-8')
+    monkeypatch.setattr(json_header, 'CHUNK_SIZE', 1)
+
+    metadata, _ = json_header.read_metadata(path)
+
+    assert metadata['version'] == 12.5
+    assert metadata['scores'] == [-3, 1e10, 0.25, True, None]
+    assert metadata['count'] == 1024
+    assert 'fields' not in metadata
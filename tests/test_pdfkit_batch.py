@@ -0,0 +1,44 @@
+import shutil
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import pdf_resources
+import report_generator
+
+
+def test_pdfkit_batch_with_shared_output_renders_each_job(tmp_path, monkeypatch):
+    shutil.copy(ROOT / "report_template.html", tmp_path / "report_template.html")
+    data_folder = tmp_path / "data"
+    data_folder.mkdir()
+    runs = []
+
+    def render(self, pairs):
+        pairs = list(pairs)
+        runs.append([str(output_path) for _, output_path in pairs])
+        for _, output_path in pairs:
+            Path(output_path).write_bytes(b"%PDF-1.4\n")
+        return {}
+
+    monkeypatch.setattr(pdf_resources.WkhtmltopdfBatch, "render", render)
+    jobs = [
+        {'output_name': 'same.pdf', 'data_folder': str(data_folder), 'force': True},
+        {'output_name': 'other.pdf', 'data_folder': str(data_folder), 'force': True},
+        {'output_name': 'same.pdf', 'data_folder': str(data_folder), 'force': True},
+    ]
+
+    results = []
+    worker = threading.Thread(
+        target=lambda: results.extend(report_generator.run_pdfkit_batch(tmp_path, tmp_path / "out", jobs)),
+        daemon=True,
+    )
+    worker.start()
+    worker.join(timeout=30)
+
+    assert not worker.is_alive(), "batch hung on a lock it already holds"
+    assert [result['status'] for result in results] == ['ok', 'ok', 'ok']
+    assert len(runs) == 2
+    assert all(len(run) == len(set(run)) for run in runs)
@@ -0,0 +1,34 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import report_export
+from report_generator import ReportGenerator
+
+
+def fake_export_job(report_folder, output_folder, job, backend=None, trace=False):
+    if job['output_name'] == 'crash.pdf':
+        os._exit(1)
+    output = Path(output_folder) / job['output_name']
+    output.write_bytes(b"%PDF-1.4\n")
+    return {'output_name': job['output_name'], 'tenant': None, 'status': 'ok', 'output': str(output),
+            'sources': [], 'duration': 0.0, 'log': ''}
+
+
+def test_export_retries_jobs_lost_to_a_worker_crash(tmp_path, monkeypatch):
+    shutil.copy(ROOT / "report_template.html", tmp_path / "report_template.html")
+    monkeypatch.setattr(report_export, 'run_export_job', fake_export_job)
+    generator = ReportGenerator(tmp_path)
+    names = ['a.pdf', 'b.pdf', 'crash.pdf', 'c.pdf', 'd.pdf', 'e.pdf']
+
+    exporter = report_export.ReportExporter(generator, tmp_path / "export.zip", workers=2)
+    failed = exporter.run([{'output_name': name} for name in names])
+
+    assert [result['output_name'] for result in failed] == ['crash.pdf']
+    assert 'BrokenProcessPool' in failed[0]['error']
+    journal = exporter.journal_path.read_text(encoding='utf-8').splitlines()
+    assert len(journal) == len(names) - 1
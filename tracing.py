@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tracing - Reporting System
+Per-stage timers with pluggable hooks (JSON lines, Chrome trace)
+"""
+
+import json
+import os
+import threading
+import time
+
+
+class _NullSpan:
+    """Shared no-op span used while tracing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setitem__(self, key, value):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span(dict):
+    """Timed stage; attributes set on it are passed to the hooks"""
+
+    def __init__(self, tracer, name, attrs):
+        super().__init__(attrs)
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.started
+        if exc_type is not None:
+            self['error'] = f"{exc_type.__name__}: {exc}"
+        self.tracer.emit({
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': duration * 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'attrs': dict(self),
+        })
+        return False
+
+
+class Tracer:
+    """Dispatches stage timings to registered hooks
+
+    Without hooks, stage() returns a shared no-op span, so instrumented code
+    pays only for one attribute check per stage.
+    """
+
+    def __init__(self, hooks=None):
+        self.hooks = list(hooks or [])
+
+    @property
+    def enabled(self):
+        return bool(self.hooks)
+
+    def add_hook(self, hook):
+        """Register callable receiving one dict per finished stage"""
+        self.hooks.append(hook)
+        return hook
+
+    def stage(self, name, **attrs):
+        """Context manager timing one stage"""
+        if not self.hooks:
+            return NULL_SPAN
+        return _Span(self, name, attrs)
+
+    def emit(self, event):
+        for hook in self.hooks:
+            hook(event)
+
+    def replay(self, events):
+        """Emit stages recorded elsewhere, e.g. by an EventBuffer in a worker process"""
+        for event in events:
+            self.emit(event)
+
+    def close(self):
+        """Flush and close hooks that hold files"""
+        for hook in self.hooks:
+            close = getattr(hook, 'close', None)
+            if close is not None:
+                close()
+
+
+class EventBuffer:
+    """Keep stages in memory, to send them from a worker process to the parent"""
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event):
+        self.events.append(event)
+
+
+class JSONLinesHook:
+    """Write one JSON object per stage to a file"""
+
+    def __init__(self, path):
+        self.f = open(path, 'a', encoding='utf-8')
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, default=str)
+        with self.lock:
+            self.f.write(line + '\n')
+            self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class ChromeTraceHook:
+    """Collect stages and write them as Chrome trace (chrome://tracing, Perfetto)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.events = []
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        with self.lock:
+            self.events.append({
+                'name': event['name'],
+                'ph': 'X',
+                'ts': event['start'] * 1e6,
+                'dur': event['duration_ms'] * 1000,
+                'pid': event['pid'],
+                'tid': event['tid'],
+                'args': event['attrs'],
+            })
+
+    def close(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events}, f, default=str)
+
+
+class StageSummaryHook:
+    """Accumulate time per stage name for a printed summary"""
+
+    def __init__(self):
+        self.totals = {}
+
+    def __call__(self, event):
+        total = self.totals.setdefault(event['name'], {'count': 0, 'duration_ms': 0.0})
+        total['count'] += 1
+        total['duration_ms'] += event['duration_ms']
+
+    def print_summary(self):
+        print("\n⏱️  Stage timings:")
+        for name, total in self.totals.items():
+            print(f"   {name:10s} {total['duration_ms']:10.2f} ms  ({total['count']}x)")
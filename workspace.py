@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Workspaces - Reporting System
+Per-tenant saved_sections and generated_pdfs folders under one report folder
+"""
+
+import re
+from pathlib import Path
+
+WORKSPACES_FOLDER = "workspaces"
+TENANT_PATTERN = re.compile(r'[A-Za-z0-9][A-Za-z0-9_.-]{0,63}')
+
+
+class Workspace:
+    """Folders of one tenant: <report folder>/workspaces/<tenant>/
+    
+    A tenant gets its own saved_sections and generated_pdfs (with its own
+    index and render cache). The report template is shared unless the
+    tenant folder contains its own report_template.html.
+    """
+    
+    def __init__(self, report_folder, tenant):
+        if not TENANT_PATTERN.fullmatch(tenant or '') or '..' in tenant:
+            raise ValueError(f"Invalid tenant name: {tenant!r}")
+        self.report_folder = Path(report_folder)
+        self.tenant = tenant
+        self.root = self.report_folder / WORKSPACES_FOLDER / tenant
+        self.data_folder = self.root / "saved_sections"
+        self.output_folder = self.root / "generated_pdfs"
+        self.data_folder.mkdir(parents=True, exist_ok=True)
+        self.output_folder.mkdir(parents=True, exist_ok=True)
+    
+    @property
+    def template_path(self):
+        own = self.root / "report_template.html"
+        return own if own.exists() else self.report_folder / "report_template.html"
+    
+    def generator(self, backend=None, tracer=None):
+        """ReportGenerator reading and writing this tenant's folders"""
+        from report_generator import ReportGenerator
+        return ReportGenerator(self.report_folder, data_folder=self.data_folder, output_folder=self.output_folder,
+                               backend=backend, tracer=tracer, template_path=self.template_path)
+    
+    def file_manager(self):
+        """FileManager ingesting into this tenant's saved_sections"""
+        from file_manager import FileManager
+        return FileManager(self.root, template_path=self.template_path)
+